@@ -0,0 +1,227 @@
+import argparse
+import csv
+import math
+import random
+import time
+import tracemalloc
+
+import heredity
+
+# Largest pedigree for which exact answers are computed as a reference
+EXACT_SIZE = 9
+
+# Number of samples drawn by each sampling mode
+SAMPLES = 1000
+
+
+def main():
+
+    # Check for proper usage
+    parser = argparse.ArgumentParser(
+        usage="python benchmark.py [--sizes N ...] [--generations N] "
+              "[--observed F] [--samples N] [--seed N] [--output data.csv]"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[5, 8, 50, 200, 500])
+    parser.add_argument("--generations", type=int, default=3)
+    parser.add_argument("--observed", type=float, default=0.5)
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    # Only write out a single generated pedigree if requested
+    if args.output:
+        people = generate_pedigree(
+            args.sizes[0], args.generations, args.observed, args.seed
+        )
+        save_pedigree(people, args.output)
+        return
+
+    print(f"{'size':>6} {'mode':<12} {'time (s)':>10} "
+          f"{'parent KB':>12} {'max error':>10}")
+    for size in args.sizes:
+        people = generate_pedigree(
+            size, args.generations, args.observed, args.seed
+        )
+        for mode, seconds, memory, error in benchmark(people, args.samples,
+                                                      args.seed):
+            error = "-" if error is None else f"{error:.4f}"
+            print(f"{size:>6} {mode:<12} {seconds:>10.3f} "
+                  f"{memory / 1024:>12.1f} {error:>10}")
+
+
+def generate_pedigree(size, generations, observed, seed=None):
+    """
+    Generate a random pedigree of about `size` people over `generations`
+    generations, in the same format as `heredity.load_data`.
+
+    The first generation are founders. Each later generation are children
+    of couples formed from the previous generation, with founders marrying
+    in when someone has no partner. Genes and traits are drawn from the
+    model in `heredity.PROBS`, and each person's trait is recorded as
+    observed with probability `observed`.
+    """
+    rng = random.Random(seed)
+    people = dict()
+
+    def add(mother=None, father=None):
+        name = f"P{len(people)}"
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": None
+        }
+        return name
+
+    per_generation = max(1, math.ceil(size / generations))
+    previous = [add() for _ in range(min(per_generation, size))]
+    for _ in range(generations - 1):
+        if len(people) >= size:
+            break
+
+        # Pair up the previous generation, marrying in a founder if needed
+        rng.shuffle(previous)
+        couples = [
+            (previous[i], previous[i + 1])
+            for i in range(0, len(previous) - 1, 2)
+        ]
+        if len(previous) % 2 == 1:
+            couples.append((previous[-1], add()))
+
+        # Give the couples children until this generation is full
+        children = []
+        for _ in range(min(per_generation, size - len(people))):
+            mother, father = rng.choice(couples)
+            children.append(add(mother, father))
+        previous = children
+
+    # Draw everyone's genes and traits, then hide the unobserved traits
+    genes = dict()
+    for person in heredity.parents_first(people):
+        distribution = heredity.gene_distribution(people, person, genes)
+        genes[person] = heredity.draw(distribution, rng)
+        trait = heredity.draw(heredity.PROBS["trait"][genes[person]], rng)
+        if rng.random() < observed:
+            people[person]["trait"] = trait
+    return people
+
+
+def save_pedigree(people, filename):
+    """
+    Write `people` to a CSV file that `heredity.load_data` can read.
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "mother", "father", "trait"])
+        for person in people.values():
+            trait = person["trait"]
+            writer.writerow([
+                person["name"],
+                person["mother"] or "",
+                person["father"] or "",
+                "" if trait is None else int(trait)
+            ])
+
+
+def benchmark(people, samples, seed=None):
+    """
+    Run every inference mode on `people` and return a list of tuples
+    `(mode, seconds, memory, error)`, where `memory` is the peak number of
+    bytes allocated in this process (not counting pool workers, so it is
+    only pool overhead for batch mode) and `error` is the largest absolute
+    difference from the exact answer, or None if that is infeasible.
+
+    Exact modes are skipped when the pedigree (or, in batch mode, its
+    largest family) has more than `EXACT_SIZE` people; the exact answer is
+    then the session's, if every family compiled into a junction tree.
+    The session mode times a single update of a session that is already
+    loaded, and is checked by asking about each person on their own.
+    """
+    largest = max(len(family) for family in heredity.families(people))
+    modes = []
+    if len(people) <= EXACT_SIZE:
+        modes.append(("exact", lambda: heredity.exact_inference(people),
+                      None))
+    if largest <= EXACT_SIZE:
+        modes.append(("batch", lambda: heredity.batch_inference(people)[0],
+                      None))
+
+    # Load the session and answer once before timing an update
+    session = heredity.Session(people, samples, seed)
+    exact = session.probabilities()
+    reference = None
+    if largest > EXACT_SIZE and all(
+        family["tree"] is not None for family in session.families
+    ):
+        reference = exact
+    person = next(
+        (p for p in people if people[p]["trait"] is None), next(iter(people))
+    )
+    trait = people[person]["trait"]
+    modes.append((
+        "session",
+        lambda: session_update(session, person, trait is None or not trait),
+        lambda: session_check(session, person, trait)
+    ))
+    for method in sorted(heredity.SAMPLERS):
+        modes.append((method, lambda method=method: heredity.sample(
+            people, method, samples, 1, seed
+        )[0], None))
+
+    results = []
+    for mode, run, answer in modes:
+        tracemalloc.start()
+        start = time.perf_counter()
+        probabilities = run()
+        seconds = time.perf_counter() - start
+        _, memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Modes that change the evidence restore it before being checked
+        if answer is not None:
+            probabilities = answer()
+        if reference is None and mode in ("exact", "batch"):
+            reference = probabilities
+        error = None
+        if reference is not None:
+            error = max_error(probabilities, reference)
+        results.append((mode, seconds, memory, error))
+    return results
+
+
+def session_update(session, person, trait):
+    """
+    Make one incremental update in a resident session: observe `person`
+    with `trait`, then answer for everyone.
+    """
+    session.observe(person, trait)
+    return session.probabilities()
+
+
+def session_check(session, person, trait):
+    """
+    Restore the trait of `person` in a resident session, then answer for
+    each person with a separate query.
+    """
+    session.observe(person, trait)
+    return {name: session.probabilities(name)[name] for name in session.people}
+
+
+def max_error(probabilities, reference):
+    """
+    Return the largest absolute difference between any probability in
+    `probabilities` and the matching one in `reference`.
+    """
+    return max(
+        abs(probabilities[person][field][value] -
+            reference[person][field][value])
+        for person in reference
+        for field in reference[person]
+        for value in reference[person][field]
+    )
+
+
+if __name__ == "__main__":
+    main()
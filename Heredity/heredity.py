@@ -1,5 +1,9 @@
+import argparse
 import csv
 import itertools
+import math
+import multiprocessing
+import random
 import sys
 
 PROBS = {
@@ -36,62 +40,147 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Default number of samples drawn by the approximate inference methods
+SAMPLES = 10000
+
+# Number of batches each sampling chain is split into for standard errors
+BATCHES = 10
+
+# Most people in a clique of a session's junction tree; families that need
+# larger cliques are sampled instead
+CLIQUE_LIMIT = 10
+
+# Share of a session's samples discarded when a sampling chain is resumed
+# after new evidence, rather than restarted
+REBURN = 0.01
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+    parser = argparse.ArgumentParser(
+        usage="python heredity.py data.csv "
+              "[--sample likelihood|gibbs] [--samples N] [--chains N] "
+              "[--seed N] [--batch] [--processes N] [--session]"
+    )
+    parser.add_argument("data")
+    parser.add_argument("--sample", choices=sorted(SAMPLERS))
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--chains", type=int, default=1)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--batch", action="store_true")
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--session", action="store_true")
+    args = parser.parse_args()
+    if args.samples < 1 or args.chains < 1:
+        parser.error("--samples and --chains must be positive")
+    if args.processes is not None and args.processes < 1:
+        parser.error("--processes must be positive")
+    people = load_data(args.data)
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
-        person: {
-            "gene": {
-                2: 0,
-                1: 0,
-                0: 0
-            },
-            "trait": {
-                True: 0,
-                False: 0
-            }
-        }
-        for person in people
-    }
+    # Answer queries interactively from a resident session if requested
+    if args.session:
+        run_session(Session(people, args.samples, args.seed))
+        return
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
+    # Solve each independent family on its own if requested
+    if args.batch:
+        probabilities, errors = batch_inference(
+            people, args.sample, args.samples, args.seed, args.processes
+        )
+        print_probabilities(probabilities, errors)
+        return
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
+    # Approximate gene and trait probabilities by sampling if requested
+    if args.sample is not None:
+        probabilities, errors = sample(
+            people, args.sample, args.samples, args.chains, args.seed
         )
-        if fails_evidence:
-            continue
+        print_probabilities(probabilities, errors)
+        return
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+    # Compute exact gene and trait probabilities for each person
+    probabilities = exact_inference(people)
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Print results
+    print_probabilities(probabilities)
+
+
+def exact_inference(people):
+    """
+    Return exact gene and trait distributions for everyone in `people`.
+
+    Every assignment of genes is enumerated, but traits are not: observed
+    traits are evidence, and unobserved traits are summed out analytically
+    from each person's genes instead of enumerating every `have_trait` set.
+
+    Probabilities are computed in log space and accumulated relative to the
+    most likely assignment seen so far, so large pedigrees cannot underflow.
+    """
+
+    # Keep track of gene and trait probabilities for each person
+    probabilities = empty_probabilities(people)
+    shift = -math.inf
+
+    # Loop over all sets of people who might have the gene
+    names = set(people)
+    for one_gene in powerset(names):
+        for two_genes in powerset(names - one_gene):
+
+            # Update probabilities with probability of genes and evidence
+            log_p = log_evidence_probability(people, one_gene, two_genes)
+            if log_p == -math.inf:
+                continue
+            if log_p > shift:
+                if shift > -math.inf:
+                    scale_probabilities(probabilities, math.exp(shift - log_p))
+                shift = log_p
+            p = math.exp(log_p - shift)
+            genes = gene_counts(people, one_gene, two_genes)
+            add_sample(probabilities, people, genes, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
 
-    # Print results
-    for person in people:
+
+def print_probabilities(probabilities, errors=None):
+    """
+    Print gene and trait distributions for each person.
+    If `errors` is given, also print the standard error of each estimate.
+    """
+    for person in probabilities:
         print(f"{person}:")
         for field in probabilities[person]:
             print(f"  {field.capitalize()}:")
             for value in probabilities[person][field]:
                 p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+                if errors is None:
+                    print(f"    {value}: {p:.4f}")
+                else:
+                    error = errors[person][field][value]
+                    print(f"    {value}: {p:.4f} ± {error:.4f}")
+
+
+def empty_probabilities(people):
+    """
+    Return a dictionary mapping each person to zeroed gene and
+    trait distributions.
+    """
+    return {
+        person: {
+            "gene": {
+                2: 0,
+                1: 0,
+                0: 0
+            },
+            "trait": {
+                True: 0,
+                False: 0
+            }
+        }
+        for person in people
+    }
 
 
 def load_data(filename):
@@ -201,6 +290,46 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
             probabilities[person]["trait"][False] += p
 
 
+def log_evidence_probability(people, one_gene, two_genes):
+    """
+    Compute and return the natural log of the probability that
+        * everyone in set `one_gene` has one copy of the gene, and
+        * everyone in set `two_genes` has two copies of the gene, and
+        * everyone not in `one_gene` or `two_gene` does not have the gene, and
+        * everyone whose trait is known has the trait they were observed with.
+    Unobserved traits are summed out, so they contribute a factor of 1.
+    Log factors are summed so that the result does not underflow for large
+    pedigrees.
+    """
+    genes = gene_counts(people, one_gene, two_genes)
+    log_p = 0
+    for person in people:
+        log_p += log(gene_distribution(people, person, genes)[genes[person]])
+        trait = people[person]["trait"]
+        if trait is not None:
+            log_p += log(PROBS["trait"][genes[person]][trait])
+    return log_p
+
+
+def log(p):
+    """
+    Return the natural log of probability `p`, which is -inf if `p` is 0.
+    """
+    return math.log(p) if p > 0 else -math.inf
+
+
+def gene_counts(people, one_gene, two_genes):
+    """
+    Return a dictionary mapping everyone in `people` to their number of
+    copies of the gene under `one_gene` and `two_genes`.
+    """
+    return {
+        person: (1 if person in one_gene else
+                 2 if person in two_genes else 0)
+        for person in people
+    }
+
+
 def normalize(probabilities):
     """
     Update `probabilities` such that each probability distribution
@@ -222,13 +351,736 @@ def normalize(probabilities):
             currTrait[i] /= sum
     
 def probMaProbPa(name,one_gene,two_genes):
-    if(name in one_gene):
+    return pass_probability(gene_counts([name], one_gene, two_genes)[name])
+
+
+def pass_probability(genes):
+    """
+    Return the probability that a parent with `genes` copies of the gene
+    passes it on to their child.
+    """
+    if genes == 1:
         return 0.5#*(1-PROBS["mutation"])? 
                   #(it only gives the exact same result 
                   #as expected (from the project page example) 
                   #if mutation is not accounted for in one_gene)
-    elif(name in two_genes):
-        return 1-PROBS["mutation"]
+    elif genes == 2:
+        return 1 - PROBS["mutation"]
     return PROBS["mutation"]
+
+
+def gene_distribution(people, person, genes):
+    """
+    Return the distribution over how many copies of the gene `person` has,
+    given the gene counts in `genes` for their parents.
+    People with no parents listed use the unconditional distribution.
+    """
+    mother = people[person]["mother"]
+    father = people[person]["father"]
+    if mother is None:
+        return PROBS["gene"]
+    ma = pass_probability(genes[mother])
+    pa = pass_probability(genes[father])
+    return {
+        2: ma * pa,
+        1: ma * (1 - pa) + pa * (1 - ma),
+        0: (1 - ma) * (1 - pa)
+    }
+
+
+def parents_first(people):
+    """
+    Return a list of everyone in `people`, ordered so that parents always
+    come before their children.
+    """
+    order = []
+    placed = set()
+    for person in people:
+        stack = [person]
+        while stack:
+            current = stack[-1]
+            if current in placed:
+                stack.pop()
+                continue
+            parents = [
+                parent for parent in (people[current]["mother"],
+                                      people[current]["father"])
+                if parent is not None and parent not in placed
+            ]
+            if parents:
+                stack.extend(parents)
+            else:
+                stack.pop()
+                placed.add(current)
+                order.append(current)
+    return order
+
+
+def children_of(people):
+    """
+    Return a dictionary mapping each person to a list of their children.
+    """
+    children = {person: [] for person in people}
+    for person in people:
+        if people[person]["mother"] is not None:
+            children[people[person]["mother"]].append(person)
+            children[people[person]["father"]].append(person)
+    return children
+
+
+def draw(distribution, rng):
+    """
+    Return a value sampled from a `distribution` dictionary mapping
+    values to (possibly unnormalized) probabilities.
+    """
+    total = sum(distribution.values())
+    r = rng.random() * total
+    for value, p in distribution.items():
+        r -= p
+        if r < 0:
+            return value
+    return value
+
+
+def add_sample(estimate, people, genes, weight):
+    """
+    Add a sampled gene assignment `genes` with weight `weight` to `estimate`.
+    Unobserved traits are summed out exactly given each person's genes,
+    which gives lower-variance trait estimates than sampling them.
+    """
+    for person in people:
+        estimate[person]["gene"][genes[person]] += weight
+        trait = people[person]["trait"]
+        if trait is None:
+            for value in (True, False):
+                estimate[person]["trait"][value] += (
+                    weight * PROBS["trait"][genes[person]][value]
+                )
+        else:
+            estimate[person]["trait"][trait] += weight
+
+
+def likelihood_weighting(people, samples, seed=None, batches=BATCHES):
+    """
+    Estimate gene and trait distributions by likelihood weighting.
+
+    Genes are sampled parents first from the inheritance model, and each
+    sample is weighted by the probability of everyone's observed trait.
+    Return a list of `batches` normalized estimates, each made from an
+    equal share of the `samples`.
+    """
+    rng = random.Random(seed)
+    order = parents_first(people)
+    size = max(1, samples // batches)
+    estimates = []
+    for _ in range(batches):
+
+        # Keep weights relative to the largest log weight seen so far,
+        # so that many observations cannot underflow the weights to 0
+        estimate = empty_probabilities(people)
+        shift = -math.inf
+        for _ in range(size):
+            genes = dict()
+            log_weight = 0
+            for person in order:
+                distribution = gene_distribution(people, person, genes)
+                genes[person] = draw(distribution, rng)
+                trait = people[person]["trait"]
+                if trait is not None:
+                    log_weight += log(PROBS["trait"][genes[person]][trait])
+            if log_weight > shift:
+                if shift > -math.inf:
+                    scale_probabilities(estimate, math.exp(shift - log_weight))
+                shift = log_weight
+            add_sample(estimate, people, genes, math.exp(log_weight - shift))
+        normalize(estimate)
+        estimates.append(estimate)
+    return estimates
+
+
+def gibbs_sampling(people, samples, seed=None, batches=BATCHES, burn_in=None,
+                   genes=None):
+    """
+    Estimate gene and trait distributions by Gibbs sampling.
+
+    Each sample is one sweep that redraws every person's genes from their
+    distribution given their parents, their children and their own observed
+    trait. The first `burn_in` sweeps (a tenth of `samples` by default) are
+    discarded. Return a list of `batches` normalized estimates, each made
+    from an equal share of the remaining sweeps.
+
+    If a `genes` dictionary is given, the chain starts from the gene counts
+    in it and leaves its final state there, so that it can be resumed.
+    """
+    rng = random.Random(seed)
+    order = parents_first(people)
+    children = children_of(people)
+    if burn_in is None:
+        burn_in = samples // 10
+
+    # Start the chain from a sample of the inheritance model
+    if genes is None:
+        genes = dict()
+    for person in order:
+        if person not in genes:
+            genes[person] = draw(
+                gene_distribution(people, person, genes), rng
+            )
+
+    size = max(1, samples // batches)
+    estimates = []
+    for sweep in range(burn_in + size * batches):
+        for person in order:
+            conditional = dict()
+            prior = gene_distribution(people, person, genes)
+            trait = people[person]["trait"]
+            for value in (0, 1, 2):
+                genes[person] = value
+                p = prior[value]
+                if trait is not None:
+                    p *= PROBS["trait"][value][trait]
+                for child in children[person]:
+                    p *= gene_distribution(people, child, genes)[genes[child]]
+                conditional[value] = p
+            genes[person] = draw(conditional, rng)
+
+        # Record the sweep once the chain has burned in
+        if sweep < burn_in:
+            continue
+        if (sweep - burn_in) % size == 0:
+            estimate = empty_probabilities(people)
+            estimates.append(estimate)
+        add_sample(estimate, people, genes, 1)
+
+    for estimate in estimates:
+        normalize(estimate)
+    return estimates
+
+
+SAMPLERS = {
+    "likelihood": likelihood_weighting,
+    "gibbs": gibbs_sampling
+}
+
+
+def sample(people, method, samples=SAMPLES, chains=1, seed=None):
+    """
+    Estimate gene and trait distributions with sampler `method`, splitting
+    `samples` evenly across `chains` independent chains that run in separate
+    processes. Chain i is seeded with `seed + i` if `seed` is given.
+
+    Return a tuple `(probabilities, errors)`, where `errors` has the same
+    shape as `probabilities` and holds the standard error of each estimate,
+    computed from the spread of the batch estimates of every chain.
+    """
+    sampler = SAMPLERS[method]
+    share = math.ceil(samples / chains)
+    arguments = [
+        (people, share, None if seed is None else seed + i)
+        for i in range(chains)
+    ]
+    if chains == 1:
+        results = [sampler(*arguments[0])]
+    else:
+        with multiprocessing.Pool(chains) as pool:
+            results = pool.starmap(sampler, arguments)
+    estimates = [estimate for result in results for estimate in result]
+
+    # Combine batch estimates into a mean and a standard error of the mean
+    n = len(estimates)
+    probabilities = empty_probabilities(people)
+    errors = empty_probabilities(people)
+    for person in people:
+        for field in probabilities[person]:
+            for value in probabilities[person][field]:
+                values = [
+                    estimate[person][field][value] for estimate in estimates
+                ]
+                mean = sum(values) / n
+                variance = 0
+                if n > 1:
+                    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+                probabilities[person][field][value] = mean
+                errors[person][field][value] = math.sqrt(variance / n)
+    return probabilities, errors
+
+
+def families(people):
+    """
+    Split `people` into independent families, the connected components of
+    the graph linking each person to their parents.
+    Return a list of dictionaries in the same format as `people`.
+    """
+    relatives = {person: set() for person in people}
+    for person in people:
+        for parent in (people[person]["mother"], people[person]["father"]):
+            if parent is not None:
+                relatives[person].add(parent)
+                relatives[parent].add(person)
+
+    # Keep each family in the order its members were loaded
+    order = {person: i for i, person in enumerate(people)}
+
+    groups = []
+    seen = set()
+    for person in people:
+        if person in seen:
+            continue
+        seen.add(person)
+        members = [person]
+        frontier = [person]
+        while frontier:
+            for relative in relatives[frontier.pop()]:
+                if relative not in seen:
+                    seen.add(relative)
+                    members.append(relative)
+                    frontier.append(relative)
+        members.sort(key=order.get)
+        groups.append({member: people[member] for member in members})
+    return groups
+
+
+def solve_family(family, method, samples, seed):
+    """
+    Return `(probabilities, errors)` for a single family, exactly if `method`
+    is None (with errors of None) or else with sampler `method`.
+    """
+    if method is None:
+        return exact_inference(family), None
+    return sample(family, method, samples, 1, seed)
+
+
+def batch_inference(people, method=None, samples=SAMPLES, seed=None,
+                    processes=None):
+    """
+    Solve every independent family in `people` separately, spread across a
+    pool of `processes` worker processes, so that the work grows with the
+    size of each family rather than with the total number of people.
+
+    Return `(probabilities, errors)` covering everyone in `people`; `errors`
+    is None for exact inference.
+    """
+    groups = families(people)
+    arguments = [
+        (family, method, samples, None if seed is None else seed + i)
+        for i, family in enumerate(groups)
+    ]
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.starmap(solve_family, arguments, chunksize=1)
+
+    probabilities = dict()
+    errors = None if method is None else dict()
+    for family_probabilities, family_errors in results:
+        probabilities.update(family_probabilities)
+        if errors is not None:
+            errors.update(family_errors)
+
+    # Report people in the order they were loaded
+    probabilities = {person: probabilities[person] for person in people}
+    if errors is not None:
+        errors = {person: errors[person] for person in people}
+    return probabilities, errors
+
+
+def scale_probabilities(probabilities, factor):
+    """
+    Multiply every value in `probabilities` by `factor`.
+    """
+    for person in probabilities:
+        for field in probabilities[person]:
+            for value in probabilities[person][field]:
+                probabilities[person][field][value] *= factor
+
+
+class JunctionTree():
+
+    def __init__(self, people, limit=None):
+        """
+        Compile the family `people` into a junction tree, which answers
+        exact gene and trait distributions while evidence changes.
+        Raise ValueError if the tree would need a clique of more than
+        `limit` people, before building any tables.
+
+        People are eliminated one at a time from the moral graph of the
+        pedigree (each person linked to their parents, and each couple to
+        each other), always picking the person whose elimination adds the
+        fewest links. Eliminating person i gives clique i: them and their
+        neighbours left at that point, in `self.cliques[i]` with person i
+        first. Its parent in the tree is the clique of the first of those
+        neighbours to be eliminated, and the neighbours are the separator
+        between the two.
+
+        Each person's inheritance factor is multiplied into the prior
+        potential of a clique that contains it, and each person's trait
+        factor belongs to their own clique. Messages between cliques are
+        cached, and new evidence only invalidates the messages that depend
+        on it.
+        """
+        self.people = people
+        names = list(people)
+        position = {person: i for i, person in enumerate(names)}
+        neighbours = {person: set() for person in names}
+        for person in names:
+            parents = [
+                parent for parent in (people[person]["mother"],
+                                      people[person]["father"])
+                if parent is not None
+            ]
+            for a, b in itertools.combinations([person] + parents, 2):
+                neighbours[a].add(b)
+                neighbours[b].add(a)
+
+        def fill(person):
+            return sum(
+                1 for a, b in itertools.combinations(neighbours[person], 2)
+                if b not in neighbours[a]
+            )
+
+        # Eliminate people, updating the fill of everyone near each change
+        fills = {person: fill(person) for person in names}
+        self.cliques = []
+        separators = []
+        eliminated = dict()
+        while fills:
+            person = min(fills, key=lambda p: (
+                fills[p], len(neighbours[p]), position[p]
+            ))
+            near = sorted(neighbours[person], key=position.get)
+            if limit is not None and len(near) + 1 > limit:
+                raise ValueError(f"family needs a clique of {len(near) + 1}")
+            eliminated[person] = len(self.cliques)
+            self.cliques.append([person] + near)
+            separators.append(near)
+            for a, b in itertools.combinations(near, 2):
+                neighbours[a].add(b)
+                neighbours[b].add(a)
+            for a in near:
+                neighbours[a].discard(person)
+            del fills[person]
+            del neighbours[person]
+            changed = set(near).union(*[neighbours[a] for a in near])
+            for a in changed:
+                fills[a] = fill(a)
+
+        self.home = eliminated
+        n = len(self.cliques)
+        self.parent = [
+            min((eliminated[a] for a in separators[i]), default=None)
+            for i in range(n)
+        ]
+        self.children = [[] for _ in range(n)]
+        for i in range(n):
+            if self.parent[i] is not None:
+                self.children[self.parent[i]].append(i)
+
+        # For each clique, the index of every entry in its separator's table
+        # as seen from the clique itself and from its parent
+        self.to_parent = [
+            projection(self.cliques[i], separators[i]) for i in range(n)
+        ]
+        self.from_parent = [
+            None if self.parent[i] is None else
+            projection(self.cliques[self.parent[i]], separators[i])
+            for i in range(n)
+        ]
+
+        # Gene count of each clique's own person in every entry
+        self.own = [projection(clique, clique[:1]) for clique in self.cliques]
+
+        # Multiply each person's inheritance factor into the prior of the
+        # first clique eliminated among them and their parents
+        self.prior = [[1.0] * 3 ** len(clique) for clique in self.cliques]
+        for person in names:
+            scope = [person] + [
+                parent for parent in (people[person]["mother"],
+                                      people[person]["father"])
+                if parent is not None
+            ]
+            i = min(eliminated[member] for member in scope)
+            prior = self.prior[i]
+            for j, genes in enumerate(
+                projection(self.cliques[i], scope, tuples=True)
+            ):
+                distribution = gene_distribution(
+                    people, person, dict(zip(scope, genes))
+                )
+                prior[j] *= distribution[genes[0]]
+
+        self.up = [None] * n
+        self.down = [None] * n
+
+    def size(self):
+        """
+        Return the number of people in the largest clique.
+        """
+        return max(len(clique) for clique in self.cliques)
+
+    def observe(self, person):
+        """
+        Invalidate the messages that depend on the trait of `person`, after
+        it has been changed in `self.people`: the messages up the tree from
+        their clique, and the messages down to every clique not above it.
+        """
+        above = set()
+        i = self.home[person]
+        while i is not None:
+            above.add(i)
+            self.up[i] = None
+            i = self.parent[i]
+        for i in range(len(self.cliques)):
+            if i not in above:
+                self.down[i] = None
+
+    def potential(self, i):
+        """
+        Return the potential of clique i: its prior times the trait factor
+        of its own person.
+        """
+        trait = self.people[self.cliques[i][0]]["trait"]
+        if trait is None:
+            return list(self.prior[i])
+        factor = [PROBS["trait"][genes][trait] for genes in (0, 1, 2)]
+        return [p * factor[g] for p, g in zip(self.prior[i], self.own[i])]
+
+    def belief(self, i, skip=None):
+        """
+        Return the potential of clique i times every message into it,
+        except the message up from child clique `skip`.
+        """
+        table = self.potential(i)
+        incoming = [
+            (self.up[child], self.from_parent[child])
+            for child in self.children[i] if child != skip
+        ]
+        if self.parent[i] is not None:
+            incoming.append((self.down[i], self.to_parent[i]))
+        for message, index in incoming:
+            table = [p * message[k] for p, k in zip(table, index)]
+        return table
+
+    def update(self, path=None):
+        """
+        Recompute invalid messages: every message up the tree, then the
+        messages down to each clique in `path`, or to every clique.
+        Children are always eliminated before their parents, so cliques
+        are visited in elimination order going up and in reverse going
+        down; `path` must likewise list a clique before its parent.
+        """
+        for i in range(len(self.cliques)):
+            if self.up[i] is None and self.parent[i] is not None:
+                self.up[i] = marginal(
+                    self.upward(i), self.to_parent[i],
+                    3 ** (len(self.cliques[i]) - 1)
+                )
+        for i in reversed(path if path is not None
+                          else range(len(self.cliques))):
+            if self.down[i] is None and self.parent[i] is not None:
+                self.down[i] = marginal(
+                    self.belief(self.parent[i], skip=i), self.from_parent[i],
+                    3 ** (len(self.cliques[i]) - 1)
+                )
+
+    def upward(self, i):
+        """
+        Return the potential of clique i times the messages up from its
+        children.
+        """
+        table = self.potential(i)
+        for child in self.children[i]:
+            message, index = self.up[child], self.from_parent[child]
+            table = [p * message[k] for p, k in zip(table, index)]
+        return table
+
+    def probabilities(self, person=None):
+        """
+        Return gene and trait distributions for everyone in the family, or
+        for `person`, in the format of `empty_probabilities`.
+        """
+        if person is None:
+            self.update()
+            names = list(self.people)
+        else:
+            path = []
+            i = self.home[person]
+            while i is not None:
+                path.append(i)
+                i = self.parent[i]
+            self.update(path)
+            names = [person]
+
+        people = {name: self.people[name] for name in names}
+        probabilities = empty_probabilities(people)
+        for name in names:
+            i = self.home[name]
+            gene = marginal(self.belief(i), self.own[i], 3)
+            for genes in (0, 1, 2):
+                add_sample(probabilities, {name: people[name]},
+                           {name: genes}, gene[genes])
+        return probabilities
+
+
+def projection(variables, scope, tuples=False):
+    """
+    Return, for every entry of a table over `variables` (three gene counts
+    each, the first variable varying slowest), the index of the matching
+    entry of a table over `scope`, or the tuple of `scope`'s gene counts
+    if `tuples` is True.
+    """
+    positions = [variables.index(variable) for variable in scope]
+    result = []
+    for genes in itertools.product((0, 1, 2), repeat=len(variables)):
+        values = tuple(genes[k] for k in positions)
+        if tuples:
+            result.append(values)
+        else:
+            index = 0
+            for value in values:
+                index = 3 * index + value
+            result.append(index)
+    return result
+
+
+def marginal(table, index, size):
+    """
+    Sum the entries of `table` into a table of `size` entries, adding each
+    entry j to entry `index[j]`, and scale the result to sum to 1 so that
+    messages do not underflow in large families.
+    """
+    result = [0.0] * size
+    for p, k in zip(table, index):
+        result[k] += p
+    total = sum(result)
+    if total == 0:
+        raise ValueError("observed traits are impossible")
+    return [p / total for p in result]
+
+
+class Session():
+
+    def __init__(self, people, samples=SAMPLES, seed=None):
+        """
+        Load a pedigree once for repeated queries as evidence changes.
+
+        Each independent family is compiled into a junction tree, which
+        caches the messages between its cliques and only recomputes those
+        that an observation affects. Families whose tree would need a
+        clique of more than `CLIQUE_LIMIT` people are answered with
+        `samples` Gibbs samples instead, resuming the chain from its last
+        state after each observation. Answers are cached per family and
+        only recomputed for families whose evidence has changed.
+        """
+        self.people = {person: dict(people[person]) for person in people}
+        self.samples = samples
+        self.seed = seed
+        self.families = []
+        self.family_of = dict()
+        for family in families(self.people):
+            compiled = {
+                "names": list(family),
+                "tree": None,
+                "answer": None,
+                "genes": None,
+                "runs": 0
+            }
+            try:
+                compiled["tree"] = JunctionTree(family, CLIQUE_LIMIT)
+            except ValueError:
+                pass
+            for person in family:
+                self.family_of[person] = compiled
+            self.families.append(compiled)
+
+    def observe(self, person, trait):
+        """
+        Record that `person` has been observed with `trait` (True or False),
+        or that their trait is unknown if `trait` is None.
+        Only the family containing `person` needs to be recomputed.
+        """
+        if person not in self.people:
+            raise ValueError(f"{person} is not in the pedigree")
+        if self.people[person]["trait"] == trait:
+            return
+        self.people[person]["trait"] = trait
+        family = self.family_of[person]
+        family["answer"] = None
+        if family["tree"] is not None:
+            family["tree"].observe(person)
+
+    def probabilities(self, person=None):
+        """
+        Return gene and trait distributions for everyone, or for `person`.
+        """
+        if person is not None:
+            family = self.family_of[person]
+            if family["answer"] is None and family["tree"] is not None:
+                return family["tree"].probabilities(person)
+            return {person: self.answer(family)[person]}
+        probabilities = dict()
+        for family in self.families:
+            probabilities.update(self.answer(family))
+        return {person: probabilities[person] for person in self.people}
+
+    def answer(self, family):
+        """
+        Return the (cached) gene and trait distributions for `family`.
+        """
+        if family["answer"] is not None:
+            return family["answer"]
+        if family["tree"] is not None:
+            family["answer"] = family["tree"].probabilities()
+            return family["answer"]
+
+        # Resume the chain with a short burn-in once it has run before
+        members = {person: self.people[person] for person in family["names"]}
+        burn_in = None
+        if family["genes"] is None:
+            family["genes"] = dict()
+        else:
+            burn_in = math.ceil(self.samples * REBURN)
+        seed = None if self.seed is None else self.seed + family["runs"]
+        family["runs"] += 1
+        estimates = gibbs_sampling(
+            members, self.samples, seed, burn_in=burn_in,
+            genes=family["genes"]
+        )
+        family["answer"] = empty_probabilities(members)
+        for estimate in estimates:
+            for name in estimate:
+                for field in estimate[name]:
+                    for value in estimate[name][field]:
+                        family["answer"][name][field][value] += (
+                            estimate[name][field][value] / len(estimates)
+                        )
+        return family["answer"]
+
+
+def run_session(session):
+    """
+    Read commands from standard input and answer them from `session`:
+        observe NAME 1|0|?   update NAME's trait (? for unknown)
+        show [NAME]          print distributions for everyone or NAME
+        quit                 end the session
+    """
+    traits = {"1": True, "0": False, "?": None}
+    for line in sys.stdin:
+        command = line.split(maxsplit=1)
+        if not command:
+            continue
+        try:
+            if command[0] == "quit":
+                break
+            elif command[0] == "show":
+                person = command[1].strip() if len(command) > 1 else None
+                print_probabilities(session.probabilities(person))
+            elif command[0] == "observe":
+                person, trait = command[1].rsplit(maxsplit=1)
+                session.observe(person.strip(), traits[trait])
+            else:
+                print("Commands: observe NAME 1|0|?, show [NAME], quit")
+        except (IndexError, KeyError, ValueError) as e:
+            print(f"Error: {e}")
+        sys.stdout.flush()
+
+
 if __name__ == "__main__":
     main()
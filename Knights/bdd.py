@@ -0,0 +1,285 @@
+from logic import (And, Biconditional, Implication, Not, Or, Symbol,
+                   postorder, sentence_children)
+
+FALSE = 0
+TRUE = 1
+
+
+class BDD():
+
+    def __init__(self):
+        """
+        Create a manager for reduced ordered binary decision diagrams.
+
+        A diagram is identified by the integer of its root node: FALSE (0)
+        and TRUE (1) are the terminals, and every other node u is the tuple
+        `nodes[u] = (level, low, high)`, meaning "if the symbol at `level`
+        is false go to `low`, else go to `high`". Symbols are ordered by the
+        level they are given when first seen. The unique table makes every
+        node distinct, so two diagrams for equivalent sentences are the same
+        integer, and the computed table caches the results of `ite`.
+        """
+        self.nodes = [(None, None, None), (None, None, None)]
+        self.unique = dict()
+        self.computed = dict()
+        self.levels = dict()
+        self.names = []
+
+    def level(self, u):
+        """
+        Return the level of node u, counting terminals as below every symbol.
+        """
+        return len(self.names) if u <= TRUE else self.nodes[u][0]
+
+    def variable(self, name):
+        """
+        Return the diagram for the symbol called `name`.
+        """
+        if name not in self.levels:
+            self.levels[name] = len(self.names)
+            self.names.append(name)
+        return self.node(self.levels[name], FALSE, TRUE)
+
+    def node(self, level, low, high):
+        """
+        Return the node for (level, low, high), reusing an existing one.
+        """
+        if low == high:
+            return low
+        key = (level, low, high)
+        u = self.unique.get(key)
+        if u is None:
+            u = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = u
+        return u
+
+    def cofactors(self, u, level):
+        """
+        Return the (low, high) children of u with respect to `level`.
+        """
+        if u <= TRUE or self.nodes[u][0] != level:
+            return u, u
+        return self.nodes[u][1], self.nodes[u][2]
+
+    def ite(self, f, g, h):
+        """
+        Return the diagram for "if f then g else h".
+        """
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+        key = (f, g, h)
+        result = self.computed.get(key)
+        if result is not None:
+            return result
+        level = min(self.level(f), self.level(g), self.level(h))
+        f0, f1 = self.cofactors(f, level)
+        g0, g1 = self.cofactors(g, level)
+        h0, h1 = self.cofactors(h, level)
+        result = self.node(
+            level, self.ite(f0, g0, h0), self.ite(f1, g1, h1)
+        )
+        self.computed[key] = result
+        return result
+
+    def compile(self, sentence):
+        """
+        Return the diagram for a logical sentence.
+        Symbols not seen before are ordered as they are first reached.
+        """
+        diagrams = dict()
+        order, _ = postorder(sentence)
+        for node in order:
+            children = [diagrams[child] for child in sentence_children(node)]
+            if isinstance(node, Symbol):
+                u = self.variable(node.name)
+            elif isinstance(node, Not):
+                u = self.ite(children[0], FALSE, TRUE)
+            elif isinstance(node, And):
+                u = TRUE
+                for child in children:
+                    u = self.ite(u, child, FALSE)
+            elif isinstance(node, Or):
+                u = FALSE
+                for child in children:
+                    u = self.ite(u, TRUE, child)
+            elif isinstance(node, Implication):
+                u = self.ite(children[0], children[1], TRUE)
+            elif isinstance(node, Biconditional):
+                u = self.ite(
+                    children[0], children[1],
+                    self.ite(children[1], FALSE, TRUE)
+                )
+            else:
+                raise TypeError(f"cannot compile {node!r} to a BDD")
+            diagrams[node] = u
+        return diagrams[sentence]
+
+    def restrict(self, u, level, value):
+        """
+        Return the diagram u with the symbol at `level` fixed to `value`.
+        """
+        cache = dict()
+
+        def visit(u):
+            if u <= TRUE or self.nodes[u][0] > level:
+                return u
+            if u not in cache:
+                node_level, low, high = self.nodes[u]
+                if node_level == level:
+                    cache[u] = high if value else low
+                else:
+                    cache[u] = self.node(node_level, visit(low), visit(high))
+            return cache[u]
+
+        return visit(u)
+
+    def reachable(self, u):
+        """
+        Return the list of non-terminal nodes reachable from u.
+        """
+        seen = set()
+        stack = [u]
+        while stack:
+            v = stack.pop()
+            if v <= TRUE or v in seen:
+                continue
+            seen.add(v)
+            stack.append(self.nodes[v][1])
+            stack.append(self.nodes[v][2])
+        return list(seen)
+
+
+class KnowledgeBase():
+
+    def __init__(self, knowledge):
+        """
+        Compile a knowledge base into a BDD once, so that it can be asked
+        many questions without being processed again.
+        """
+        self.bdd = BDD()
+        self.root = self.bdd.compile(knowledge)
+        self.symbols = list(self.bdd.names)
+
+    def size(self):
+        """
+        Return the number of nodes in the compiled knowledge base.
+        """
+        return len(self.bdd.reachable(self.root))
+
+    def entails(self, query):
+        """
+        Return True if the knowledge base entails `query`.
+        A query that is a symbol or a negated symbol only needs one pass
+        over the compiled knowledge base; other queries are compiled and
+        combined with it.
+        """
+        if self.root == FALSE:
+            return True
+        literal = query
+        value = False
+        if isinstance(literal, Not):
+            literal = literal.operand
+            value = True
+        if isinstance(literal, Symbol):
+            if literal.name not in self.bdd.levels:
+                return False
+            level = self.bdd.levels[literal.name]
+            return self.bdd.restrict(self.root, level, value) == FALSE
+
+        # Knowledge entails query if knowledge implies query everywhere
+        query = self.bdd.compile(query)
+        return self.bdd.ite(self.root, query, TRUE) == TRUE
+
+    def count_models(self):
+        """
+        Return the number of assignments to the knowledge base's symbols
+        in which it is true, in one pass over the compiled knowledge base.
+        """
+        n = len(self.symbols)
+
+        def level(u):
+            return min(self.bdd.level(u), n)
+
+        counts = {FALSE: 0, TRUE: 1}
+        for u in sorted(self.bdd.reachable(self.root),
+                        key=lambda u: -self.bdd.nodes[u][0]):
+            node_level, low, high = self.bdd.nodes[u]
+            counts[u] = (
+                counts[low] * 2 ** (level(low) - node_level - 1) +
+                counts[high] * 2 ** (level(high) - node_level - 1)
+            )
+        return counts[self.root] * 2 ** level(self.root)
+
+    def forced(self):
+        """
+        Return a dictionary mapping each symbol that has the same value in
+        every model of the knowledge base to that value, or None if the
+        knowledge base has no models.
+
+        Every node other than FALSE leads to a model, so a symbol is free
+        exactly when some reachable edge tests it both ways or skips over
+        it; one pass over the nodes finds every such symbol.
+        """
+        if self.root == FALSE:
+            return None
+        n = len(self.symbols)
+        can_be = {True: [False] * n, False: [False] * n}
+
+        # Symbols skipped by an edge can take either value
+        skipped = [0] * (n + 1)
+
+        def skip(start, end):
+            end = min(end, n)
+            if start < end:
+                skipped[start] += 1
+                skipped[end] -= 1
+
+        skip(0, self.bdd.level(self.root))
+        for u in self.bdd.reachable(self.root):
+            level, low, high = self.bdd.nodes[u]
+            for value, child in ((False, low), (True, high)):
+                if child != FALSE:
+                    can_be[value][level] = True
+                    skip(level + 1, self.bdd.level(child))
+
+        forced = dict()
+        free = 0
+        for level, name in enumerate(self.symbols):
+            free += skipped[level]
+            if free:
+                continue
+            if can_be[True][level] and not can_be[False][level]:
+                forced[name] = True
+            elif can_be[False][level] and not can_be[True][level]:
+                forced[name] = False
+        return forced
+
+
+def entails(knowledge, query, stats=None):
+    """
+    Return True if `knowledge` entails `query`, using a BDD.
+    If a `stats` dictionary is given, record the size of the compiled
+    knowledge base and the total number of nodes created in it.
+    """
+    knowledge = KnowledgeBase(knowledge)
+    entailed = knowledge.entails(query)
+    if stats is not None:
+        stats["nodes"] = knowledge.size()
+        stats["created"] = len(knowledge.bdd.nodes) - 2
+    return entailed
+
+
+def entails_all(knowledge, queries):
+    """
+    Return a list of booleans saying which of `queries` `knowledge` entails,
+    compiling the knowledge base only once.
+    """
+    knowledge = KnowledgeBase(knowledge)
+    return [knowledge.entails(query) for query in queries]
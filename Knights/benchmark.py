@@ -0,0 +1,158 @@
+import argparse
+import random
+import time
+import tracemalloc
+
+from logic import (And, BIT_LIMIT, Biconditional, METHODS, Not, Or, Symbol,
+                   model_check)
+
+# Clause to variable ratio at which random 3-SAT is hardest
+PHASE_TRANSITION = 4.26
+
+# Most symbols each method is asked to handle, if it has a limit
+LIMITS = {
+    "enumerate": 20,
+    "bits": BIT_LIMIT,
+    "prune": 40,
+    "parallel": 40,
+    "bdd": 30
+}
+
+
+def main():
+
+    # Check for proper usage
+    parser = argparse.ArgumentParser(
+        usage="python benchmark.py [--sat N ...] [--people N ...] "
+              "[--methods METHOD ...] [--seed N]"
+    )
+    parser.add_argument("--sat", type=int, nargs="*",
+                        default=[10, 16, 20, 50, 100])
+    parser.add_argument("--people", type=int, nargs="*",
+                        default=[3, 6, 10, 30])
+    parser.add_argument("--methods", nargs="+", choices=sorted(METHODS),
+                        default=sorted(METHODS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'instance':<16} {'method':<10} {'entailed':>9} "
+          f"{'time (s)':>9} {'parent KB':>12}  counts")
+    instances = [
+        (f"3-sat n={n}", *random_ksat(n, seed=args.seed)) for n in args.sat
+    ] + [
+        (f"knights n={n}", *knights_puzzle(n, seed=args.seed))
+        for n in args.people
+    ]
+    for name, knowledge, queries in instances:
+        for method in args.methods:
+            result = benchmark(knowledge, queries, method)
+            if result is None:
+                continue
+            entailed, seconds, memory, stats = result
+            counts = ", ".join(f"{k} {v}" for k, v in stats.items())
+            print(f"{name:<16} {method:<10} {entailed:>4}/{len(queries):<4} "
+                  f"{seconds:>9.3f} {memory / 1024:>12.1f}  {counts}")
+
+
+def random_ksat(n, ratio=PHASE_TRANSITION, k=3, seed=None):
+    """
+    Generate a random k-SAT knowledge base over `n` symbols with
+    round(ratio * n) clauses, each of k distinct symbols negated at random.
+    Return the knowledge base and a list of queries: a few random literals.
+    """
+    rng = random.Random(seed)
+    symbols = [Symbol(f"x{i}") for i in range(n)]
+
+    def literal(symbol):
+        return symbol if rng.random() < 0.5 else Not(symbol)
+
+    clauses = [
+        Or(*[literal(symbol) for symbol in rng.sample(symbols, k)])
+        for _ in range(round(ratio * n))
+    ]
+    queries = [literal(symbol) for symbol in rng.sample(symbols, min(n, 3))]
+    return And(*clauses), queries
+
+
+def knights_puzzle(n, seed=None):
+    """
+    Generate a knights and knaves puzzle in the style of puzzle.py with `n`
+    people, each of whom makes one random statement about others.
+    Statements are chosen to fit a hidden assignment of knights and knaves,
+    so every puzzle has at least one solution.
+    Return the knowledge base and a list of queries: whether each person is
+    a knight and whether each is a knave.
+    """
+    rng = random.Random(seed)
+    hidden = [rng.random() < 0.5 for _ in range(n)]
+    knights = [Symbol(f"{chr(65 + i % 26)}{i // 26 or ''} is a Knight")
+               for i in range(n)]
+    knaves = [Symbol(f"{chr(65 + i % 26)}{i // 26 or ''} is a Knave")
+              for i in range(n)]
+    knowledge = [
+        Biconditional(knights[i], Not(knaves[i])) for i in range(n)
+    ]
+
+    for i in range(n):
+        others = [j for j in range(n) if j != i] or [i]
+        j = rng.choice(others)
+        k = rng.choice(others)
+        statement = rng.choice([
+
+            # "j is a knight" / "j is a knave"
+            lambda: knights[j],
+            lambda: knaves[j],
+
+            # "j and I are the same kind"
+            lambda: Or(And(knights[i], knights[j]), And(knaves[i], knaves[j])),
+
+            # "At least one of j and k is a knave"
+            lambda: Or(knaves[j], knaves[k]),
+
+            # "j would say that k is a knave"
+            lambda: Biconditional(knights[j], knaves[k])
+        ])()
+
+        # Knights only say true things and knaves only say false things
+        truth = {symbol.name: hidden[m] for m, symbol in enumerate(knights)}
+        truth.update(
+            {symbol.name: not hidden[m] for m, symbol in enumerate(knaves)}
+        )
+        if statement.evaluate(truth) != hidden[i]:
+            statement = Not(statement)
+
+        # What a person says is true exactly when they are a knight
+        knowledge.append(Biconditional(knights[i], statement))
+    return And(*knowledge), knights + knaves
+
+
+def benchmark(knowledge, queries, method):
+    """
+    Check every query against the knowledge base with `method`.
+    Return a tuple of the number of queries entailed, the time taken, the
+    peak memory allocated in this process (not counting the worker
+    processes of the parallel method) and the summed counts reported by the
+    method, or None if the instance has more symbols than the method's
+    limit.
+    """
+    symbols = knowledge.symbols().union(*[q.symbols() for q in queries])
+    if len(symbols) > LIMITS.get(method, len(symbols)):
+        return None
+
+    totals = dict()
+    entailed = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    for query in queries:
+        stats = dict()
+        entailed += model_check(knowledge, query, method, stats)
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+    seconds = time.perf_counter() - start
+    _, memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return entailed, seconds, memory, totals
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import re
+import sys
+import time
+
+from logic import (And, Biconditional, Implication, Not, Or, Sentence, Symbol,
+                   model_check_all)
+
+# Operators in formula text, with ASCII alternatives
+OPERATORS = {
+    "¬": "¬", "~": "¬", "!": "¬",
+    "∧": "∧", "&": "∧",
+    "∨": "∨", "|": "∨",
+    "=>": "=>", "->": "=>",
+    "<=>": "<=>", "<->": "<=>"
+}
+
+# Binding strength of each operator, from loosest to tightest
+PRECEDENCE = {"<=>": 1, "=>": 2, "∨": 3, "∧": 4, "¬": 5}
+
+TOKENS = re.compile(r"(<=>|<->|=>|->|[¬~!∧&∨|()])")
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python loader.py knowledge [query ...]")
+    knowledge, stats = load(sys.argv[1])
+    for key, value in stats.items():
+        print(f"{key}: {value}")
+    queries = [parse(query) for query in sys.argv[2:]]
+    for query, entailed in zip(queries, model_check_all(knowledge, queries)):
+        print(f"{query.formula()}: {'entailed' if entailed else 'unknown'}")
+
+
+def parse(text):
+    """
+    Parses a formula in the syntax produced by `Sentence.formula()` into a
+    sentence, in time linear in the length of the text.
+
+    Symbol names are any text between operators and parentheses, with
+    surrounding whitespace removed. From tightest to loosest binding, the
+    operators are ¬ (or ~, !), ∧ (or &), ∨ (or |), => (or ->) and <=>
+    (or <->). Chains of ∧ or ∨ become a single And or Or, and => and <=>
+    group to the right.
+    """
+    operators = []
+    operands = []
+    expect_operand = True
+
+    def reduce():
+        operator, arity = operators.pop()
+        arguments = operands[-arity:]
+        del operands[-arity:]
+        if operator == "¬":
+            operands.append(Not(*arguments))
+        elif operator == "∧":
+            operands.append(And(*arguments))
+        elif operator == "∨":
+            operands.append(Or(*arguments))
+        elif operator == "=>":
+            operands.append(Implication(*arguments))
+        else:
+            operands.append(Biconditional(*arguments))
+
+    for token in TOKENS.split(text):
+        token = token.strip()
+        if not token:
+            continue
+        token = OPERATORS.get(token, token)
+
+        if token in ("¬", "("):
+            if not expect_operand:
+                raise ValueError(f"expected an operator before {token!r}")
+            operators.append([token, 1])
+
+        elif token == ")":
+            if expect_operand:
+                raise ValueError("expected a formula before ')'")
+            while operators and operators[-1][0] != "(":
+                reduce()
+            if not operators:
+                raise ValueError("unbalanced ')'")
+            operators.pop()
+
+        elif token in PRECEDENCE:
+            if expect_operand:
+                raise ValueError(f"expected a formula before {token!r}")
+            precedence = PRECEDENCE[token]
+            while operators and operators[-1][0] != "(":
+                top = operators[-1][0]
+                if PRECEDENCE[top] < precedence or (
+                    top == token and token in ("=>", "<=>", "∧", "∨")
+                ):
+                    break
+                reduce()
+
+            # Extend a chain of the same connective instead of nesting
+            if token in ("∧", "∨") and operators and (
+                operators[-1][0] == token
+            ):
+                operators[-1][1] += 1
+            else:
+                operators.append([token, 2])
+            expect_operand = True
+
+        else:
+            if not expect_operand:
+                raise ValueError(f"expected an operator before {token!r}")
+            operands.append(Symbol(token))
+            expect_operand = False
+
+    if expect_operand:
+        raise ValueError("formula is incomplete")
+    while operators:
+        if operators[-1][0] == "(":
+            raise ValueError("unbalanced '('")
+        reduce()
+    return operands[0]
+
+
+def load(filename):
+    """
+    Loads a knowledge base from a file, which is read as DIMACS CNF if its
+    name ends in .cnf or .dimacs and as one formula per line otherwise.
+    Returns the knowledge base and a dictionary of load statistics.
+    """
+    if filename.endswith((".cnf", ".dimacs")):
+        return load_dimacs(filename)
+    return load_formulas(filename)
+
+
+def load_formulas(filename):
+    """
+    Loads a knowledge base from a file with one formula per line (blank
+    lines and lines starting with # are skipped), streaming the file so
+    that only the parsed sentences are kept in memory.
+    Returns the conjunction of the formulas and a dictionary of statistics.
+    """
+    start = time.perf_counter()
+    nodes = len(Sentence._instances)
+    formulas = []
+    lines = 0
+    with open(filename) as f:
+        for line in f:
+            lines += 1
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                formulas.append(parse(line))
+            except ValueError as e:
+                raise ValueError(f"{filename}, line {lines}: {e}")
+    knowledge = And(*formulas)
+    return knowledge, statistics(knowledge, start, nodes, {
+        "lines": lines,
+        "formulas": len(formulas)
+    })
+
+
+def load_dimacs(filename):
+    """
+    Loads a knowledge base from a DIMACS CNF file, where variable n becomes
+    the symbol named "xn" and each clause becomes an Or of literals.
+    Returns the conjunction of the clauses and a dictionary of statistics.
+    """
+    start = time.perf_counter()
+    nodes = len(Sentence._instances)
+    clauses = []
+    clause = []
+    literals = dict()
+    declared = None
+    lines = 0
+    with open(filename) as f:
+        for line in f:
+            lines += 1
+            line = line.strip()
+            if not line or line.startswith("c"):
+                continue
+            if line.startswith("%"):
+                break
+            if line.startswith("p"):
+                fields = line.split()
+                if len(fields) != 4 or fields[1] != "cnf":
+                    raise ValueError(f"{filename}, line {lines}: bad header")
+                declared = (int(fields[2]), int(fields[3]))
+                continue
+            for literal in map(int, line.split()):
+                if literal == 0:
+                    clauses.append(Or(*clause))
+                    clause = []
+                    continue
+
+                # Build each literal's sentence only the first time it is seen
+                if literal not in literals:
+                    symbol = Symbol(f"x{abs(literal)}")
+                    literals[literal] = symbol if literal > 0 else Not(symbol)
+                clause.append(literals[literal])
+    if clause:
+        clauses.append(Or(*clause))
+    knowledge = And(*clauses)
+    stats = {"lines": lines, "clauses": len(clauses)}
+    if declared is not None:
+        stats["declared variables"], stats["declared clauses"] = declared
+    return knowledge, statistics(knowledge, start, nodes, stats)
+
+
+def statistics(knowledge, start, nodes, stats):
+    """
+    Adds symbol, new node and timing counts for a loaded knowledge base to
+    `stats`, given the load start time and the node count beforehand.
+    """
+    stats["symbols"] = len(knowledge.symbols())
+    stats["new nodes"] = len(Sentence._instances) - nodes
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,85 @@
 import itertools
+import math
+import multiprocessing
+import os
+import weakref
+
+# Largest number of symbols the bit-parallel truth table will handle
+BIT_LIMIT = 26
 
 
 class Sentence():
+    """
+    Sentences are immutable and interned: constructing a sentence that is
+    structurally identical to one that already exists returns the existing
+    object, so shared subformulas are stored once, equality is identity,
+    and each sentence's hash and set of symbols are computed only once.
+    """
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Every sentence currently alive, keyed by its class and operands
+    _instances = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, key, hash_key, **fields):
+        """
+        Returns the sentence of this class identified by `key`, creating it
+        with the given fields (and a hash of `hash_key`) if it is new.
+        """
+        key = (cls, key)
+        sentence = Sentence._instances.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for field, value in fields.items():
+                object.__setattr__(sentence, field, value)
+            object.__setattr__(sentence, "_hash", hash(hash_key))
+            object.__setattr__(sentence, "_symbols", None)
+            Sentence._instances[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("logical sentences are immutable")
+
+    def __hash__(self):
+        return self._hash
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave some
+        symbols unassigned, returning None if its value is still unknown.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozen set of all symbols in the logical sentence."""
+        if self._symbols is None:
+
+            # Fill in subsentences first, so that deep sentences do not
+            # recurse
+            order, _ = postorder(self)
+            for node in order:
+                if node._symbols is None and not isinstance(node, Symbol):
+                    object.__setattr__(node, "_symbols", frozenset().union(
+                        *[child.symbols() for child in sentence_children(node)]
+                    ))
+        return self._symbols
+
+    def compile(self, symbols):
+        """
+        Returns a function that evaluates the logical sentence in a model
+        given as a sequence of booleans, where model[i] is the value of the
+        symbol named symbols[i].
+        """
+        return compile_sentence(self, symbols)
 
     @classmethod
     def validate(cls, sentence):
@@ -44,14 +110,13 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __new__(cls, name):
+        return cls.intern(name, ("symbol", name), name=name)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -62,23 +127,29 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", frozenset([self.name]))
+        return self._symbols
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    __slots__ = ("operand",)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern(operand, ("not", hash(operand)), operand=operand)
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,27 +157,30 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+    __slots__ = ("conjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+    def __new__(cls, *conjuncts):
+        for conjunct in conjuncts:
+            Sentence.validate(conjunct)
+        return cls.intern(
+            conjuncts,
+            ("and", tuple(hash(conjunct) for conjunct in conjuncts)),
+            conjuncts=conjuncts
         )
 
+    def __reduce__(self):
+        return (And, self.conjuncts)
+
     def __repr__(self):
         conjunctions = ", ".join(
             [str(conjunct) for conjunct in self.conjuncts]
@@ -114,36 +188,54 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        raise AttributeError(
+            "logical sentences are immutable; use with_conjunct instead"
+        )
+
+    def with_conjunct(self, conjunct):
+        """
+        Returns a new conjunction with `conjunct` added, since sentences
+        cannot be changed once created.
+        """
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            elif value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    __slots__ = ("disjuncts",)
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+    def __new__(cls, *disjuncts):
+        for disjunct in disjuncts:
+            Sentence.validate(disjunct)
+        return cls.intern(
+            disjuncts,
+            ("or", tuple(hash(disjunct) for disjunct in disjuncts)),
+            disjuncts=disjuncts
         )
 
+    def __reduce__(self):
+        return (Or, self.disjuncts)
+
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
@@ -151,30 +243,39 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            elif value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return cls.intern(
+            (antecedent, consequent),
+            ("implies", hash(antecedent), hash(consequent)),
+            antecedent=antecedent,
+            consequent=consequent
+        )
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,81 +284,508 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        elif antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return cls.intern(
+            (left, right),
+            ("biconditional", hash(left), hash(right)),
+            left=left,
+            right=right
+        )
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
+
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+def compile_sentence(sentence, symbols):
+    """
+    Compiles a sentence into a function of a model given as a sequence of
+    booleans indexed like `symbols`.
+
+    The sentence is turned into the source of a single Python function, so
+    evaluating it costs no method calls or dictionary lookups. Subformulas
+    that appear more than once are computed once into a local variable.
+    Sentences too deeply nested for Python to compile fall back to a chain
+    of closures.
+    """
+    index = {name: i for i, name in enumerate(symbols)}
+    for name in sentence.symbols():
+        if name not in index:
+            raise Exception(f"variable {name} not in model")
+
+    # Build an expression for each node, naming the shared ones
+    order, references = postorder(sentence)
+    expressions = dict()
+    lines = []
+    for node in order:
+        children = [
+            expressions[id(child)] for child in sentence_children(node)
+        ]
+        if isinstance(node, Symbol):
+            expressions[id(node)] = f"m[{index[node.name]}]"
+            continue
+        elif isinstance(node, Not):
+            expression = f"(not {children[0]})"
+        elif isinstance(node, And):
+            expression = "(" + " and ".join(children or ["True"]) + ")"
+        elif isinstance(node, Or):
+            expression = "(" + " or ".join(children or ["False"]) + ")"
+        elif isinstance(node, Implication):
+            expression = f"(not {children[0]} or {children[1]})"
+        elif isinstance(node, Biconditional):
+            expression = f"({children[0]} == {children[1]})"
         else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+            return compile_closure(sentence, index)
+        if references[id(node)] > 1:
+            lines.append(f"    t{len(lines)} = {expression}")
+            expression = f"t{len(lines) - 1}"
+        expressions[id(node)] = expression
+    lines.append(f"    return bool({expressions[id(sentence)]})")
+
+    source = "def evaluate(m):\n" + "\n".join(lines)
+    namespace = dict()
+    try:
+        exec(compile(source, "<sentence>", "exec"), namespace)
+    except (SyntaxError, RecursionError, MemoryError):
+        return compile_closure(sentence, index)
+    return namespace["evaluate"]
+
+
+def compile_closure(sentence, index):
+    """
+    Compiles a sentence into a chain of closures over a model given as a
+    sequence of booleans, where `index` maps symbol names to positions.
+    """
+    if isinstance(sentence, Symbol):
+        i = index[sentence.name]
+        return lambda m: bool(m[i])
+    children = [
+        compile_closure(child, index) for child in sentence_children(sentence)
+    ]
+    if isinstance(sentence, Not):
+        operand, = children
+        return lambda m: not operand(m)
+    elif isinstance(sentence, And):
+        return lambda m: all(child(m) for child in children)
+    elif isinstance(sentence, Or):
+        return lambda m: any(child(m) for child in children)
+    elif isinstance(sentence, Implication):
+        antecedent, consequent = children
+        return lambda m: not antecedent(m) or consequent(m)
+    elif isinstance(sentence, Biconditional):
+        left, right = children
+        return lambda m: left(m) == right(m)
+    return lambda m: sentence.evaluate(
+        {name: m[i] for name, i in index.items()}
+    )
+
+
+def postorder(sentence):
+    """
+    Returns a list of the distinct nodes of a sentence with children before
+    their parents, and a dictionary mapping the id of each node to the
+    number of times it is used (as the whole sentence or as a child).
+    """
+    order = []
+    references = dict()
+    stack = [(sentence, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        references[id(node)] = references.get(id(node), 0) + 1
+        if references[id(node)] > 1:
+            continue
+        stack.append((node, True))
+        for child in reversed(sentence_children(node)):
+            stack.append((child, False))
+    return order, references
+
+
+def sentence_children(sentence):
+    """Returns a sequence of the immediate subsentences of a sentence."""
+    if isinstance(sentence, Not):
+        return [sentence.operand]
+    elif isinstance(sentence, And):
+        return sentence.conjuncts
+    elif isinstance(sentence, Or):
+        return sentence.disjuncts
+    elif isinstance(sentence, Implication):
+        return [sentence.antecedent, sentence.consequent]
+    elif isinstance(sentence, Biconditional):
+        return [sentence.left, sentence.right]
+    return []
+
+
+def model_check(knowledge, query, method="sat", stats=None):
+    """
+    Checks if knowledge base entails query, using one of `METHODS`:
+        "sat": checks that knowledge ∧ ¬query is unsatisfiable with a
+               CDCL SAT solver (see sat.py)
+        "enumerate": checks the query in every model of the knowledge
+        "bits": evaluates the knowledge and query in all models at once as
+                bit-parallel truth tables (up to `BIT_LIMIT` symbols)
+        "prune": searches partial models, most frequent symbols first, and
+                 stops exploring a branch once the knowledge is false or
+                 the query is decided there
+        "parallel": splits the "prune" search into sub-cubes by fixing the
+                    first few symbols and checks them in a process pool
+        "bdd": compiles the knowledge into a binary decision diagram and
+               checks the query against it (see bdd.py)
+
+    If a `stats` dictionary is given, the method records counts of the work
+    it did there, such as models, search nodes or solver conflicts.
+    """
+    try:
+        check = METHODS[method]
+    except KeyError:
+        raise ValueError(f"unknown model checking method {method!r}")
+    return check(knowledge, query, stats)
+
+
+def model_check_all(knowledge, queries, method="sat"):
+    """
+    Checks which of several queries the knowledge base entails, returning a
+    list of booleans in the same order as `queries`.
+
+    The knowledge base is only processed once: "sat" keeps one solver and
+    checks each query under an assumption, "enumerate" walks the models of
+    the knowledge once for every query, "bits" builds its truth table
+    once and "bdd" compiles the knowledge once. Other methods check each
+    query separately.
+    """
+    queries = list(queries)
+    if method in ALL_METHODS:
+        return ALL_METHODS[method](knowledge, queries)
+    return [model_check(knowledge, query, method) for query in queries]
+
+
+def sat_check_all(knowledge, queries):
+    """Checks which queries knowledge base entails with one SAT solver."""
+    import sat
+    return sat.entails_all(knowledge, queries)
+
+
+def bdd_check_all(knowledge, queries):
+    """Checks which queries knowledge base entails with one compiled BDD."""
+    import bdd
+    return bdd.entails_all(knowledge, queries)
+
+
+def enumerate_check_all(knowledge, queries):
+    """Checks which queries knowledge base entails in one pass over models."""
+    symbols = model_symbols(knowledge, queries)
+    knowledge = knowledge.compile(symbols)
+    undecided = {
+        i: query.compile(symbols) for i, query in enumerate(queries)
+    }
+    entailed = [True] * len(queries)
+
+    # Drop each query as soon as a model of the knowledge base falsifies it
+    for model in itertools.product((True, False), repeat=len(symbols)):
+        if not undecided:
+            break
+        if knowledge(model):
+            for i, query in list(undecided.items()):
+                if not query(model):
+                    entailed[i] = False
+                    del undecided[i]
+    return entailed
+
+
+def bits_check_all(knowledge, queries):
+    """Checks which queries knowledge base entails with one truth table."""
+    symbols = model_symbols(knowledge, queries, BIT_LIMIT)
+    knowledge = truth_table(knowledge, symbols)
+    return [
+        knowledge & ~truth_table(query, symbols) == 0 for query in queries
+    ]
+
+
+def sat_check(knowledge, query, stats=None):
+    """Checks if knowledge base entails query with a SAT solver."""
+
+    # Imported here since the solver is itself built on this module
+    import sat
+    return sat.entails(knowledge, query, stats)
+
+
+def bdd_check(knowledge, query, stats=None):
+    """Checks if knowledge base entails query with a BDD."""
+
+    # Imported here since BDDs are compiled from this module's sentences
+    import bdd
+    return bdd.entails(knowledge, query, stats)
+
+
+def enumerate_check(knowledge, query, stats=None):
+    """Checks if knowledge base entails query by enumerating all models."""
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    symbols = model_symbols(knowledge, [query])
+
+    # Compile both sentences to evaluate them quickly in every model
+    knowledge = knowledge.compile(symbols)
+    query = query.compile(symbols)
+
+    # If knowledge base is true in a model, then query must also be true
+    models = itertools.product((True, False), repeat=len(symbols))
+    for count, model in enumerate(models, 1):
+        if knowledge(model) and not query(model):
+            break
+    else:
+        count = None
+    if stats is not None:
+        stats["models"] = 2 ** len(symbols) if count is None else count
+    return count is None
+
+
+def prune_check(knowledge, query, stats=None):
+    """
+    Checks if knowledge base entails query by searching partial models,
+    abandoning each branch as soon as three-valued evaluation decides it.
+    """
+    order = branching_order(knowledge, query)
+    if stats is not None:
+        stats["nodes"] = 0
+    return partial_check(knowledge, query, order, dict(), stats)
+
+
+def partial_check(knowledge, query, order, model, stats=None):
+    """
+    Checks that query holds in every model of knowledge that extends the
+    partial `model`, assigning the remaining symbols in `order`.
+    `model` is extended in place and restored before returning.
+    Counts each partial model visited in stats["nodes"] if given.
+    """
+    if stats is not None:
+        stats["nodes"] += 1
+
+    # Nothing to check where the knowledge base is already false
+    knowledge_value = knowledge.evaluate_partial(model)
+    if knowledge_value is False:
+        return True
+
+    # Query already holds in every extension of this model
+    query_value = query.evaluate_partial(model)
+    if query_value is True:
+        return True
+
+    # Every extension of this model is a counter-model
+    if knowledge_value is True and query_value is False:
+        return False
+
+    # Otherwise, try both values of the next unassigned symbol
+    p = next(symbol for symbol in order if symbol not in model)
+    for value in (True, False):
+        model[p] = value
+        entailed = partial_check(knowledge, query, order, model, stats)
+        del model[p]
+        if not entailed:
+            return False
+    return True
+
+
+def parallel_check(knowledge, query, stats=None, processes=None):
+    """
+    Checks if knowledge base entails query by fixing the first few symbols
+    of the branching order to every combination of values and checking
+    each of these sub-cubes in a separate worker process.
+    The pool is terminated as soon as any worker finds a counter-model.
+    """
+    order = branching_order(knowledge, query)
+    processes = processes or os.cpu_count() or 1
+
+    # Make about four sub-cubes per process to keep every worker busy
+    depth = min(len(order), math.ceil(math.log2(processes)) + 2)
+    cubes = [
+        (knowledge, query, order, dict(zip(order, values)))
+        for values in itertools.product((True, False), repeat=depth)
+    ]
+    if stats is not None:
+        stats["cubes"] = len(cubes)
+        stats["processes"] = processes
+    with multiprocessing.Pool(processes) as pool:
+        for entailed in pool.imap_unordered(check_cube, cubes):
+            if not entailed:
+                return False
+    return True
+
+
+def check_cube(arguments):
+    """
+    Checks a sub-cube for `parallel_check`, given a tuple of the knowledge
+    base, query, branching order and partial model that fixes the cube.
+    """
+    knowledge, query, order, model = arguments
+    return partial_check(knowledge, query, order, model)
+
+
+def branching_order(*sentences):
+    """
+    Returns the names of all symbols in the sentences, most frequently
+    occurring first, where each distinct subsentence counts once.
+    """
+    counts = dict()
+    for sentence in sentences:
+        for name in sentence.symbols():
+            counts.setdefault(name, 0)
+        order, _ = postorder(sentence)
+        for node in order:
+            for child in sentence_children(node):
+                if isinstance(child, Symbol):
+                    counts[child.name] += 1
+    return sorted(counts, key=lambda name: (-counts[name], name))
+
+
+def bits_check(knowledge, query, stats=None):
+    """
+    Checks if knowledge base entails query by computing the truth table of
+    each over all models as the bits of an integer.
+    """
+    symbols = model_symbols(knowledge, [query], BIT_LIMIT)
+    knowledge = truth_table(knowledge, symbols)
+    query = truth_table(query, symbols)
+    if stats is not None:
+        stats["models"] = 2 ** len(symbols)
+
+    # No model may make the knowledge base true and the query false
+    return knowledge & ~query == 0
+
+
+def model_symbols(knowledge, queries, limit=None):
+    """
+    Returns the sorted names of the symbols in the knowledge base and the
+    queries, which models of them assign. Raises ValueError if there are
+    more than `limit` of them to build a truth table over.
+    """
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+    if limit is not None and len(symbols) > limit:
+        raise ValueError(
+            f"{len(symbols)} symbols is too many for a truth table "
+            f"(limit {limit})"
+        )
+    return symbols
+
+
+def truth_table(sentence, symbols):
+    """
+    Returns an integer whose bit k is the value of the sentence in model k,
+    the model in which symbols[i] is true exactly when bit i of k is set.
+
+    Python integers act as bit vectors over all 2^n models, so each
+    connective is a single bitwise operation over every model at once.
+    """
+    size = 2 ** len(symbols)
+    everything = (1 << size) - 1
+    index = {name: i for i, name in enumerate(symbols)}
+
+    # Count how many parents use each node, so tables can be freed early
+    order, parents = postorder(sentence)
+    tables = dict()
+    for node in order:
+        children = sentence_children(node)
+        operands = [tables[id(child)] for child in children]
+        for child in children:
+            parents[id(child)] -= 1
+            if parents[id(child)] == 0:
+                del tables[id(child)]
+
+        if isinstance(node, Symbol):
+            table = symbol_table(index[node.name], size)
+        elif isinstance(node, Not):
+            table = everything ^ operands[0]
+        elif isinstance(node, And):
+            table = everything
+            for operand in operands:
+                table &= operand
+        elif isinstance(node, Or):
+            table = 0
+            for operand in operands:
+                table |= operand
+        elif isinstance(node, Implication):
+            table = (everything ^ operands[0]) | operands[1]
+        elif isinstance(node, Biconditional):
+            table = everything ^ (operands[0] ^ operands[1])
+        else:
+            raise TypeError(f"cannot build truth table for {node!r}")
+        tables[id(node)] = table
+    return tables[id(sentence)]
+
+
+def symbol_table(i, size):
+    """
+    Returns the truth table of the i-th symbol over `size` models: bit k is
+    set exactly when bit i of k is set.
+    """
+    half = 1 << i
+    table = ((1 << half) - 1) << half
+    width = 2 * half
+
+    # Repeat the pattern by doubling until it covers every model
+    while width < size:
+        table |= table << width
+        width *= 2
+    return table
+
+
+METHODS = {
+    "sat": sat_check,
+    "enumerate": enumerate_check,
+    "bits": bits_check,
+    "prune": prune_check,
+    "parallel": parallel_check,
+    "bdd": bdd_check
+}
+
+ALL_METHODS = {
+    "sat": sat_check_all,
+    "enumerate": enumerate_check_all,
+    "bits": bits_check_all,
+    "bdd": bdd_check_all
+}
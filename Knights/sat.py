@@ -0,0 +1,467 @@
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class CNF():
+
+    def __init__(self):
+        """
+        Create an empty CNF formula.
+
+        Variables are positive integers and a literal is a variable or its
+        negation. `variables` maps each symbol name to its variable, and
+        `clauses` is a list of clauses, each a list of literals.
+        """
+        self.count = 0
+        self.variables = dict()
+        self.clauses = []
+        self.definitions = dict()
+
+    def new_variable(self):
+        """
+        Return a fresh variable.
+        """
+        self.count += 1
+        return self.count
+
+    def symbol(self, name):
+        """
+        Return the variable for the symbol called `name`.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Return a literal that is true exactly when `sentence` is true,
+        adding Tseitin definitions for any compound subformulas.
+        Identical subformulas share a single definition.
+        """
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        if isinstance(sentence, And):
+            operands = [self.literal(c) for c in sentence.conjuncts]
+            v = self.new_variable()
+
+            # v => each conjunct, and all conjuncts => v
+            for a in operands:
+                self.clauses.append([-v, a])
+            self.clauses.append([v] + [-a for a in operands])
+        elif isinstance(sentence, Or):
+            operands = [self.literal(d) for d in sentence.disjuncts]
+            v = self.new_variable()
+
+            # each disjunct => v, and v => some disjunct
+            for a in operands:
+                self.clauses.append([v, -a])
+            self.clauses.append([-v] + operands)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            v = self.new_variable()
+            self.clauses.append([-v, -a, b])
+            self.clauses.append([v, a])
+            self.clauses.append([v, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.new_variable()
+            self.clauses.append([-v, -a, b])
+            self.clauses.append([-v, a, -b])
+            self.clauses.append([v, a, b])
+            self.clauses.append([v, -a, -b])
+        else:
+            raise TypeError(f"cannot convert {sentence!r} to CNF")
+
+        self.definitions[sentence] = v
+        return v
+
+    def add(self, sentence):
+        """
+        Assert that `sentence` is true.
+        Top-level conjunctions and disjunctions of literals are added as
+        clauses directly rather than through a definition.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or) and all(
+            isinstance(d, Symbol) or
+            (isinstance(d, Not) and isinstance(d.operand, Symbol))
+            for d in sentence.disjuncts
+        ):
+            self.clauses.append([self.literal(d) for d in sentence.disjuncts])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+class Solver():
+
+    def __init__(self):
+        """
+        Create a CDCL SAT solver with no clauses.
+
+        Clauses are watched on their first two literals. Conflicts are
+        analysed to the first unique implication point, the learned clause
+        is kept, and the search backjumps to the clause's second highest
+        decision level. Decisions pick the most active variable (VSIDS)
+        with its last assigned polarity, and the search restarts after a
+        geometrically growing number of conflicts.
+        """
+        self.count = 0
+        self.clauses = []
+        self.learned = []
+        self.watches = dict()
+        self.value = [None]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.polarity = [False]
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.heap = []
+        self.increment = 1.0
+        self.unsatisfiable = False
+        self.model = None
+
+        # Search statistics
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+
+    def ensure(self, variable):
+        """
+        Make room for variables up to `variable`.
+        """
+        while self.count < variable:
+            self.count += 1
+            self.value.append(None)
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.polarity.append(False)
+            self.watches[self.count] = []
+            self.watches[-self.count] = []
+            heapq.heappush(self.heap, (0.0, self.count))
+
+    def literal_value(self, literal):
+        """
+        Return True, False or None for the current value of `literal`.
+        """
+        value = self.value[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def add_clause(self, literals):
+        """
+        Add a clause, given as an iterable of literals.
+        Must only be called between calls to `solve`.
+        """
+        if self.unsatisfiable:
+            return
+        clause = []
+        for literal in literals:
+            self.ensure(abs(literal))
+            value = self.literal_value(literal)
+            if value is True or -literal in clause:
+                return
+            if value is None and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.watches[clause[0]].append(clause)
+            self.watches[clause[1]].append(clause)
+            self.clauses.append(clause)
+
+    def assign(self, literal, reason):
+        """
+        Make `literal` true at the current decision level.
+        """
+        variable = abs(literal)
+        self.value[variable] = literal > 0
+        self.level[variable] = len(self.trail_limits)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assign every literal implied by unit clauses.
+        Return a conflicting clause, or None if there is no conflict.
+        """
+        value = self.value
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            self.propagations += 1
+            watching = self.watches[false]
+            self.watches[false] = kept = []
+            for i, clause in enumerate(watching):
+
+                # Keep the false literal in the second watched position
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                v = value[abs(first)]
+                if v is not None and v == (first > 0):
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal that is not false to watch
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    v = value[abs(literal)]
+                    if v is None or v == (literal > 0):
+                        clause[1], clause[k] = literal, false
+                        self.watches[literal].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if value[abs(first)] is None:
+                        self.assign(first, clause)
+                    else:
+                        kept.extend(watching[i + 1:])
+                        return clause
+        return None
+
+    def analyze(self, conflict):
+        """
+        Return a learned clause for `conflict`, with its asserting literal
+        first, and the decision level to backjump to.
+        """
+        current = len(self.trail_limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        literal = None
+        while True:
+            for q in clause:
+                if q == literal:
+                    continue
+                variable = abs(q)
+                if variable in seen or self.level[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.level[variable] == current:
+                    pending += 1
+                else:
+                    learned.append(q)
+
+            # Walk back to the next literal involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+        learned[0] = -literal
+
+        # Backjump to the highest level among the other literals
+        level = 0
+        if len(learned) > 1:
+            best = max(range(1, len(learned)),
+                       key=lambda i: self.level[abs(learned[i])])
+            learned[1], learned[best] = learned[best], learned[1]
+            level = self.level[abs(learned[1])]
+        self.increment /= 0.95
+        return learned, level
+
+    def bump(self, variable):
+        """
+        Increase the activity of `variable`, rescaling if it grows too large.
+        """
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, self.count + 1)
+                         if self.value[v] is None]
+            heapq.heapify(self.heap)
+        elif self.value[variable] is None:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """
+        Undo every assignment made above decision level `level`.
+        """
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.value[variable] = None
+            self.reason[variable] = None
+            self.polarity[variable] = literal > 0
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = start
+
+    def decide(self):
+        """
+        Return the unassigned variable with the highest activity,
+        or None if every variable is assigned.
+        """
+        while self.heap:
+            activity, variable = heapq.heappop(self.heap)
+            if (self.value[variable] is None and
+                    -activity == self.activity[variable]):
+                return variable
+        for variable in range(1, self.count + 1):
+            if self.value[variable] is None:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Return True if the clauses are satisfiable with every literal in
+        `assumptions` true, else False. If satisfiable, `model` maps each
+        variable to its value. Learned clauses are kept between calls.
+        """
+        self.model = None
+        if self.unsatisfiable:
+            return False
+        for literal in assumptions:
+            self.ensure(abs(literal))
+        if self.propagate() is not None:
+            self.unsatisfiable = True
+            return False
+
+        limit = 100
+        conflicts = 0
+        try:
+            while True:
+                conflict = self.propagate()
+                if conflict is not None:
+                    self.conflicts += 1
+                    conflicts += 1
+                    if not self.trail_limits:
+                        self.unsatisfiable = True
+                        return False
+                    learned, level = self.analyze(conflict)
+                    self.backtrack(level)
+                    if len(learned) == 1:
+                        self.assign(learned[0], None)
+                    else:
+                        self.watches[learned[0]].append(learned)
+                        self.watches[learned[1]].append(learned)
+                        self.learned.append(learned)
+                        self.assign(learned[0], learned)
+                    continue
+
+                # Restart, keeping learned clauses, once enough conflicts
+                if conflicts >= limit:
+                    conflicts = 0
+                    limit = int(limit * 1.5)
+                    self.backtrack(0)
+                    continue
+
+                # Assumptions are decided first, one per decision level
+                level = len(self.trail_limits)
+                if level < len(assumptions):
+                    literal = assumptions[level]
+                    value = self.literal_value(literal)
+                    if value is False:
+                        return False
+                    self.trail_limits.append(len(self.trail))
+                    if value is None:
+                        self.assign(literal, None)
+                    continue
+
+                variable = self.decide()
+                if variable is None:
+                    self.model = {
+                        v: self.value[v] for v in range(1, self.count + 1)
+                    }
+                    return True
+                self.decisions += 1
+                self.trail_limits.append(len(self.trail))
+                literal = variable if self.polarity[variable] else -variable
+                self.assign(literal, None)
+        finally:
+            self.backtrack(0)
+
+
+def satisfiable(sentence):
+    """
+    Return a model (a dictionary mapping symbol names to values) in which
+    `sentence` is true, or None if there is no such model.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    for name in sentence.symbols():
+        cnf.symbol(name)
+    solver = Solver()
+    for clause in cnf.clauses:
+        solver.add_clause(clause)
+    solver.ensure(cnf.count)
+    if not solver.solve():
+        return None
+    return {
+        name: solver.model[variable]
+        for name, variable in cnf.variables.items()
+    }
+
+
+def entails(knowledge, query, stats=None):
+    """
+    Return True if `knowledge` entails `query`, which is the case exactly
+    when `knowledge` and not `query` cannot both be true.
+    If a `stats` dictionary is given, record the size of the CNF and the
+    solver's search counts in it.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    solver = Solver()
+    for clause in cnf.clauses:
+        solver.add_clause(clause)
+    entailed = not solver.solve()
+    if stats is not None:
+        stats["variables"] = cnf.count
+        stats["clauses"] = len(cnf.clauses)
+        stats["decisions"] = solver.decisions
+        stats["conflicts"] = solver.conflicts
+        stats["propagations"] = solver.propagations
+    return entailed
+
+
+def entails_all(knowledge, queries):
+    """
+    Return a list of booleans saying which of `queries` `knowledge` entails.
+    One solver holds the knowledge base; each query only adds definitions
+    for its own subformulas and is checked by assuming it is false, so
+    clauses learned for one query are reused for the next.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    solver = Solver()
+    added = 0
+    entailed = []
+    for query in queries:
+        literal = cnf.literal(query)
+        for clause in cnf.clauses[added:]:
+            solver.add_clause(clause)
+        added = len(cnf.clauses)
+        entailed.append(not solver.solve([-literal]))
+    return entailed
@@ -0,0 +1,247 @@
+"""
+Monte Carlo Tree Search Player for Tic Tac Toe and m,n,k-games
+"""
+
+import importlib
+import math
+import multiprocessing
+import random
+import time
+import types
+
+import tictactoe as ttt
+
+# Weight of exploration against exploitation when selecting children (UCT)
+EXPLORATION = math.sqrt(2)
+
+# Default budgets for choosing a move: playouts run and seconds taken
+PLAYOUTS = 10000
+TIME_LIMIT = 2.0
+
+# Playouts each worker process runs per batch
+BATCH = 16
+
+# Rules used by rollouts in worker processes, set by `init_worker`
+rules = None
+
+
+class Node():
+
+    __slots__ = ("board", "move", "parent", "children", "untried",
+                 "visits", "wins")
+
+    def __init__(self, board, move, parent, actions):
+        """
+        Create a tree node for `board`, reached by playing `move` from
+        `parent`, with `actions` still to be expanded.
+
+        `wins` counts playouts won by the player who made `move`, with a
+        draw counting as half a win.
+        """
+        self.board = board
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = actions
+        self.visits = 0
+        self.wins = 0
+
+
+class MCTS():
+
+    def __init__(self, rules=ttt, playouts=PLAYOUTS, time_limit=TIME_LIMIT,
+                 processes=1, seed=None):
+        """
+        Create a Monte Carlo Tree Search player for `rules`: the tictactoe
+        module or any object with the same functions, such as an mnk.Game.
+
+        Each move stops after `playouts` playouts or `time_limit` seconds,
+        whichever comes first; either may be None for no limit. With more
+        than one process, rollouts are run in batches across a pool.
+        """
+        if playouts is None and time_limit is None:
+            raise ValueError("MCTS needs a playout or time budget")
+        self.rules = rules
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.processes = processes
+        self.rng = random.Random(seed)
+        self.root = None
+        self.pool = None
+
+    def close(self):
+        """
+        Shuts down the worker processes, if any were started.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def minimax(self, board):
+        """
+        Returns the best action found for the current player on the board,
+        so that an MCTS player can stand in for the tictactoe module.
+        """
+        action, _, _ = self.search(board)
+        return action
+
+    def search(self, board):
+        """
+        Runs playouts from the board within the budget, but always at least
+        one, reusing any part of the tree kept from earlier searches.
+        Returns a tuple of the most visited action (None if the game is
+        over), its estimated value from X's point of view (between -1 and 1)
+        and the number of playouts run.
+        """
+        if self.rules.terminal(board):
+            return None, self.rules.utility(board), 0
+        self.root = self.find(board) or self.node(board, None, None)
+        self.root.parent = None
+
+        deadline = None
+        if self.time_limit is not None:
+            deadline = time.perf_counter() + self.time_limit
+        batch = BATCH * self.processes if self.processes > 1 else 1
+        done = 0
+        while True:
+            if self.playouts is not None:
+                batch = max(1, min(batch, self.playouts - done))
+            self.iterate(batch)
+            done += batch
+            if ((self.playouts is not None and done >= self.playouts) or
+                    (deadline is not None and
+                     time.perf_counter() >= deadline)):
+                break
+
+        best = max(self.root.children, key=lambda child: child.visits)
+        rate = best.wins / best.visits if best.visits else 0.5
+        if self.rules.player(board) == ttt.O:
+            rate = 1 - rate
+        return best.move, 2 * rate - 1, done
+
+    def advance(self, move):
+        """
+        Moves the root of the tree to the child for `move`, keeping the
+        statistics gathered below it for the next search.
+        """
+        if self.root is None:
+            return
+        for child in self.root.children:
+            if child.move == move:
+                child.parent = None
+                self.root = child
+                return
+        self.root = None
+
+    def find(self, board):
+        """
+        Returns the node for the board among the root, its children and its
+        grandchildren, or None if the tree does not reach it.
+        """
+        if self.root is None:
+            return None
+        if self.root.board == board:
+            return self.root
+        for child in self.root.children:
+            if child.board == board:
+                return child
+            for grandchild in child.children:
+                if grandchild.board == board:
+                    return grandchild
+        return None
+
+    def node(self, board, move, parent):
+        """
+        Returns a new node for the board, with its actions in random order.
+        """
+        actions = []
+        if not self.rules.terminal(board):
+            actions = list(self.rules.actions(board))
+            self.rng.shuffle(actions)
+        return Node(board, move, parent, actions)
+
+    def iterate(self, batch):
+        """
+        Selects `batch` leaves, expanding each by one child, runs a rollout
+        from each and backs the results up the tree.
+
+        Until its result is known, every node on a selected path counts a
+        visit without a win (a "virtual loss"), which steers the other
+        selections of the batch elsewhere.
+        """
+        leaves = []
+        for _ in range(batch):
+            node = self.root
+            node.visits += 1
+            while not node.untried and node.children:
+                node = self.select(node)
+                node.visits += 1
+            if node.untried:
+                move = node.untried.pop()
+                child = self.node(
+                    self.rules.result(node.board, move), move, node
+                )
+                node.children.append(child)
+                node = child
+                node.visits += 1
+            leaves.append(node)
+
+        jobs = [(leaf.board, self.rng.getrandbits(32)) for leaf in leaves]
+        if self.processes > 1:
+            if self.pool is None:
+                spec = self.rules
+                if isinstance(spec, types.ModuleType):
+                    spec = spec.__name__
+                self.pool = multiprocessing.Pool(
+                    self.processes, initializer=init_worker, initargs=(spec,)
+                )
+            winners = self.pool.map(rollout, jobs, chunksize=BATCH)
+        else:
+            init_worker(self.rules)
+            winners = [rollout(job) for job in jobs]
+
+        for leaf, winner in zip(leaves, winners):
+            node = leaf
+            while node.parent is not None:
+                mover = self.rules.player(node.parent.board)
+                if winner is None:
+                    node.wins += 0.5
+                elif winner == mover:
+                    node.wins += 1
+                node = node.parent
+
+    def select(self, node):
+        """
+        Returns the child of a fully expanded node with the highest upper
+        confidence bound (UCT).
+        """
+        scale = EXPLORATION * math.sqrt(math.log(node.visits))
+        return max(
+            node.children,
+            key=lambda child: (child.wins / child.visits +
+                               scale / math.sqrt(child.visits))
+        )
+
+
+def init_worker(spec):
+    """
+    Sets the rules rollouts play by: a rules object, or the name of a module
+    of rules functions to import.
+    """
+    global rules
+    if isinstance(spec, str):
+        spec = importlib.import_module(spec)
+    rules = spec
+
+
+def rollout(job):
+    """
+    Plays random moves from a (board, seed) job until the game is over.
+    Returns the winner, or None for a draw.
+    """
+    board, seed = job
+    rng = random.Random(seed)
+    while not rules.terminal(board):
+        board = rules.result(board, rng.choice(list(rules.actions(board))))
+    return rules.winner(board)
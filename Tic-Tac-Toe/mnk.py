@@ -0,0 +1,529 @@
+"""
+m,n,k-game Player: Tic Tac Toe on a board of m rows and n columns, won by
+the first player to get k in a row horizontally, vertically or diagonally
+"""
+
+import multiprocessing
+import time
+
+from tictactoe import EMPTY, O, X
+
+# Seconds the computer may spend choosing a move
+TIME_LIMIT = 2.0
+
+# Only empty cells within this many steps of a played cell are searched
+REACH = 2
+
+# Positions searched between checks of the clock
+CHECK_EVERY = 256
+
+
+# Rules and shared root bound used by worker processes, set by `init_worker`
+game = None
+bound = None
+
+
+class OutOfTime(Exception):
+    """
+    Raised inside a search when its time budget runs out.
+    """
+
+
+class Budget():
+
+    __slots__ = ("nodes", "deadline", "timed")
+
+    def __init__(self, deadline, timed):
+        """
+        Count the positions a search visits, and stop it once the clock
+        passes `deadline` (in seconds since the epoch, so that every
+        process agrees on it) if the search is `timed`.
+        """
+        self.nodes = 0
+        self.deadline = deadline
+        self.timed = timed
+
+    def visit(self):
+        """
+        Counts a position, raising OutOfTime if the deadline has passed.
+        """
+        self.nodes += 1
+        if (self.timed and self.nodes % CHECK_EVERY == 0 and
+                time.time() > self.deadline):
+            raise OutOfTime
+
+
+class Game():
+
+    X = X
+    O = O
+    EMPTY = EMPTY
+
+    def __init__(self, m=3, n=3, k=3, time_limit=TIME_LIMIT, processes=1):
+        """
+        Create the rules for an m,n,k-game, and an engine that spends at
+        most `time_limit` seconds choosing each move. With more than one
+        process, the moves from the root are searched in parallel.
+        """
+        if m < 1 or n < 1 or k < 1 or k > max(m, n):
+            raise ValueError(f"no {m},{n},{k}-game can be won")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.time_limit = time_limit
+        self.processes = processes
+        self.pool = None
+        self.bound = None
+
+        # Every run of k cells in a row, column or diagonal
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    if (0 <= i + di * (k - 1) < m and
+                            0 <= j + dj * (k - 1) < n):
+                        self.lines.append(
+                            [(i + di * t, j + dj * t) for t in range(k)]
+                        )
+
+        # Cells from the centre outwards, the order moves are tried in
+        self.cells = sorted(
+            ((i, j) for i in range(m) for j in range(n)),
+            key=lambda cell: (abs(2 * cell[0] - (m - 1)) +
+                              abs(2 * cell[1] - (n - 1)))
+        )
+
+        # The same, with each cell (i, j) numbered i * n + j for searching,
+        # and for each cell the lines through it and the cells near it
+        self.flat_lines = [[i * n + j for i, j in line] for line in self.lines]
+        self.flat_cells = [i * n + j for i, j in self.cells]
+        self.lines_through = [[] for _ in range(m * n)]
+        for index, line in enumerate(self.flat_lines):
+            for cell in line:
+                self.lines_through[cell].append(index)
+        self.neighbours = [
+            [a * n + b
+             for a in range(max(0, i - REACH), min(m, i + REACH + 1))
+             for b in range(max(0, j - REACH), min(n, j + REACH + 1))]
+            for i in range(m) for j in range(n)
+        ]
+
+        # line_values[x][o] is what a line with x cells of X and o cells
+        # of O adds to the heuristic evaluation
+        self.line_values = [
+            [10 ** x if x and not o else -10 ** o if o and not x else 0
+             for o in range(k + 1)]
+            for x in range(k + 1)
+        ]
+
+        # Larger than any heuristic evaluation, and than any sum of them
+        self.win = 4 * m * n * 10 ** k
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x = sum(row.count(X) for row in board)
+        o = sum(row.count(O) for row in board)
+        return X if x == o else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i, j in self.cells if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n):
+            raise ValueError(f"{action} is off the board")
+        if board[i][j] != EMPTY:
+            raise ValueError(f"{action} is already taken")
+        new_board = [row[:] for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        for line in self.lines:
+            i, j = line[0]
+            first = board[i][j]
+            if first != EMPTY and all(board[i][j] == first
+                                      for i, j in line):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (self.winner(board) is not None or
+                all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(board)
+        return 1 if winner == X else -1 if winner == O else 0
+
+    def evaluate(self, board):
+        """
+        Returns a heuristic value of a board that is not over, positive when
+        X is ahead. Every line still open to only one player counts 10 ** c
+        towards that player, where c is the number of cells they hold in it.
+        """
+        return Board(self, board).score
+
+    def candidates(self, board):
+        """
+        Returns the empty cells worth searching on a board, centre first:
+        those within REACH steps of a played cell, or the centre alone if
+        nothing has been played.
+        """
+        return [divmod(cell, self.n) for cell in Board(self, board).moves()]
+
+    def minimax(self, board):
+        """
+        Returns the best action found for the current player on the board
+        within the time limit.
+        """
+        action, _, _, _ = self.search(board)
+        return action
+
+    def __getstate__(self):
+        """
+        Returns the game's attributes for pickling, without the worker
+        processes, which cannot be pickled.
+        """
+        state = self.__dict__.copy()
+        state["pool"] = state["bound"] = None
+        return state
+
+    def start(self):
+        """
+        Starts the worker processes, if the search is parallel and they are
+        not running yet. Searches start them when first needed; a program
+        that starts threads or libraries of its own should start them
+        before those, so that workers do not inherit them.
+        """
+        if self.processes > 1 and self.pool is None:
+            self.bound = multiprocessing.Value("q")
+            self.pool = multiprocessing.Pool(
+                self.processes, initializer=init_worker,
+                initargs=(self, self.bound)
+            )
+
+    def close(self):
+        """
+        Shuts down the worker processes, if any were started.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+            self.bound = None
+
+    def search(self, board, time_limit=None, max_depth=None):
+        """
+        Searches the board with iterative-deepening alpha-beta, one ply
+        deeper each time, until the time limit, `max_depth` or the end of
+        the game is reached. Returns a tuple of the best action (None if the
+        game is over), its value, the number of positions visited and the
+        deepest search completed.
+
+        Values are from X's point of view: the heuristic evaluation at the
+        search horizon, or plus or minus `self.win`, less the number of
+        moves needed, for a forced win.
+        """
+        if time_limit is None:
+            time_limit = self.time_limit
+        deadline = time.time() + time_limit
+        position = Board(self, board)
+        if position.winner is not None or position.empty == 0:
+            return None, self.utility(board) * self.win, 0, 0
+        maximizing = position.turn == X
+        cells = position.moves()
+        best = (cells[0], 0)
+        nodes = 0
+        completed = 0
+        limit = 1
+
+        while max_depth is None or limit <= max_depth:
+            budget = Budget(deadline, limit > 1)
+            try:
+                if self.processes > 1:
+                    scores = self.split_root(board, cells, limit, budget)
+                else:
+                    scores = self.root(position, cells, limit, budget)
+            except OutOfTime:
+                break
+            finally:
+                nodes += budget.nodes
+
+            # Search the best moves first in the next, deeper iteration.
+            # Only the values of the best moves are exact when the root is
+            # split, so the rest keep their order to stay deterministic.
+            if self.processes > 1:
+                value = (max if maximizing else min)(scores.values())
+                cells.sort(key=lambda cell: scores[cell] != value)
+            else:
+                cells.sort(key=lambda cell: scores[cell],
+                           reverse=maximizing)
+            best = (cells[0], scores[cells[0]])
+            completed = limit
+
+            # Stop once the game is solved or the whole board was searched
+            if (abs(best[1]) > self.win - self.m * self.n or
+                    limit >= position.empty):
+                break
+            limit += 1
+
+        return divmod(best[0], self.n), best[1], nodes, completed
+
+    def root(self, position, cells, depth, budget):
+        """
+        Searches each move in `cells` from the position to `depth` plies in
+        turn. Returns a dictionary of their scores: exact for the first
+        move with the best score, and bounds for the others.
+        """
+        scores = dict()
+        alpha, beta = -self.win, self.win
+        for cell in cells:
+            position.make(cell)
+            try:
+                score = self.alphabeta(position, depth - 1, alpha, beta, 1,
+                                       budget)
+            finally:
+                position.unmake()
+            scores[cell] = score
+            if position.turn == X:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+        return scores
+
+    def split_root(self, board, cells, depth, budget):
+        """
+        Searches each move in `cells` from the board to `depth` plies, in
+        parallel across the worker processes. Returns a dictionary of their
+        scores: exact for every move with the best score, and bounds for
+        the others.
+
+        Workers share the best score found so far, and search each move
+        with a window just wide enough to tell a move that ties with it
+        from one that is worse, so that the moves with the best score, and
+        so the move chosen, do not depend on which worker finished first.
+        """
+        self.start()
+        maximizing = self.player(board) == X
+        with self.bound.get_lock():
+            self.bound.value = -self.win if maximizing else self.win
+        tasks = [(board, cell, depth, budget.deadline, budget.timed)
+                 for cell in cells]
+        scores = dict()
+        timed_out = False
+        for cell, (score, nodes) in zip(cells, self.pool.imap(
+                search_move, tasks)):
+            budget.nodes += nodes
+            if score is None:
+                timed_out = True
+            scores[cell] = score
+        if timed_out:
+            raise OutOfTime
+        return scores
+
+    def alphabeta(self, position, depth, alpha, beta, ply, budget):
+        """
+        Returns the value of the position searched `depth` plies deep, `ply`
+        plies below the root. The value is exact if it lies strictly
+        between alpha and beta; otherwise it is only an upper bound (if at
+        most alpha) or a lower bound (if at least beta).
+        """
+        budget.visit()
+        if position.winner is not None:
+            return (self.win - ply if position.winner == X
+                    else ply - self.win)
+        if position.empty == 0:
+            return 0
+        if depth == 0:
+            return position.score
+
+        if position.turn == X:
+            value = -self.win
+            for cell in position.moves():
+                position.make(cell)
+                value = max(value, self.alphabeta(
+                    position, depth - 1, alpha, beta, ply + 1, budget
+                ))
+                position.unmake()
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+        else:
+            value = self.win
+            for cell in position.moves():
+                position.make(cell)
+                value = min(value, self.alphabeta(
+                    position, depth - 1, alpha, beta, ply + 1, budget
+                ))
+                position.unmake()
+                beta = min(beta, value)
+                if alpha >= beta:
+                    break
+        return value
+
+
+class Board():
+    """
+    A position that a search changes in place, one move at a time, instead
+    of building a new board for every position it visits.
+    """
+
+    __slots__ = ("game", "cells", "turn", "empty", "winner", "score",
+                 "x_counts", "o_counts", "near", "history")
+
+    def __init__(self, game, board):
+        """
+        Set up the position of a list-of-lists board of `game`. Cells are
+        numbered i * n + j, and besides the cells the position keeps the
+        side to move, the number of empty cells, the winner, the heuristic
+        evaluation, how many cells of each player are in every line and
+        how many played cells are near every cell.
+        """
+        self.game = game
+        self.cells = [EMPTY] * (game.m * game.n)
+        self.empty = game.m * game.n
+        self.winner = None
+        self.score = 0
+        self.x_counts = [0] * len(game.flat_lines)
+        self.o_counts = [0] * len(game.flat_lines)
+        self.near = [0] * (game.m * game.n)
+        self.history = []
+        for i, row in enumerate(board):
+            for j, piece in enumerate(row):
+                if piece != EMPTY:
+                    self.place(i * game.n + j, piece)
+        self.turn = game.player(board)
+
+    def place(self, cell, piece):
+        """
+        Puts `piece` in an empty cell, updating everything that depends on
+        it from the lines and cells around it alone.
+        """
+        game = self.game
+        values = game.line_values
+        x_counts, o_counts = self.x_counts, self.o_counts
+        self.cells[cell] = piece
+        self.empty -= 1
+        for line in game.lines_through[cell]:
+            x, o = x_counts[line], o_counts[line]
+            self.score -= values[x][o]
+            if piece == X:
+                x += 1
+                x_counts[line] = x
+            else:
+                o += 1
+                o_counts[line] = o
+            self.score += values[x][o]
+            if x == game.k or o == game.k:
+                self.winner = piece
+        for other in game.neighbours[cell]:
+            self.near[other] += 1
+
+    def make(self, cell):
+        """
+        Plays the side to move in an empty cell.
+        """
+        self.history.append((cell, self.winner))
+        self.place(cell, self.turn)
+        self.turn = O if self.turn == X else X
+
+    def unmake(self):
+        """
+        Takes back the last move played with `make`.
+        """
+        cell, winner = self.history.pop()
+        game = self.game
+        values = game.line_values
+        x_counts, o_counts = self.x_counts, self.o_counts
+        piece = self.cells[cell]
+        self.cells[cell] = EMPTY
+        self.empty += 1
+        self.winner = winner
+        for line in game.lines_through[cell]:
+            x, o = x_counts[line], o_counts[line]
+            self.score -= values[x][o]
+            if piece == X:
+                x -= 1
+                x_counts[line] = x
+            else:
+                o -= 1
+                o_counts[line] = o
+            self.score += values[x][o]
+        for other in game.neighbours[cell]:
+            self.near[other] -= 1
+        self.turn = piece
+
+    def moves(self):
+        """
+        Returns the empty cells worth searching, centre first: those within
+        REACH steps of a played cell, or the centre alone if nothing has
+        been played.
+        """
+        if self.empty == len(self.cells):
+            return self.game.flat_cells[:1]
+        cells, near = self.cells, self.near
+        return [cell for cell in self.game.flat_cells
+                if cells[cell] == EMPTY and near[cell]]
+
+
+def init_worker(rules, shared):
+    """
+    Sets the game and the shared root bound that `search_move` uses.
+    """
+    global game, bound
+    game = rules
+    bound = shared
+
+
+def search_move(task):
+    """
+    Searches one move from the root for `Game.split_root`, given a task
+    (board, cell, depth, deadline, timed). Returns a tuple of the move's
+    score, or None if time ran out, and the number of positions visited.
+    """
+    board, cell, depth, deadline, timed = task
+    position = Board(game, board)
+    maximizing = position.turn == X
+    position.make(cell)
+    budget = Budget(deadline, timed)
+
+    # A move must beat the best score so far less one to matter, so moves
+    # that tie with the best get exact scores
+    with bound.get_lock():
+        best = bound.value
+    if maximizing:
+        alpha, beta = best - 1, game.win
+    else:
+        alpha, beta = -game.win, best + 1
+    try:
+        score = game.alphabeta(position, depth - 1, alpha, beta, 1, budget)
+    except OutOfTime:
+        return None, budget.nodes
+
+    with bound.get_lock():
+        if score > bound.value if maximizing else score < bound.value:
+            bound.value = score
+    return score, budget.nodes
@@ -0,0 +1,171 @@
+"""
+Headless self-play benchmark for the Tic Tac Toe engines: plays each engine
+against itself and against a random player, checks that perfect play never
+loses, and reports how fast each engine moves
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import mcts
+import mnk
+import tictactoe as ttt
+
+# Engines that play perfectly on a 3x3 board, so must never lose there
+PERFECT = {"table", "search", "cold", "mnk"}
+
+
+def main():
+
+    # Check for proper usage
+    parser = argparse.ArgumentParser(
+        usage="python selfplay.py [--games N] [--engines ENGINE ...] "
+              "[--board M N K] [--playouts N] [--time-limit S] "
+              "[--processes N] [--seed N]"
+    )
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--engines", nargs="+",
+                        choices=["table", "search", "cold", "mnk", "mcts"],
+                        default=["table", "search", "cold", "mnk", "mcts"])
+    parser.add_argument("--board", type=int, nargs=3, default=[3, 3, 3],
+                        metavar=("M", "N", "K"))
+    parser.add_argument("--playouts", type=int, default=1000)
+    parser.add_argument("--time-limit", type=float, default=mnk.TIME_LIMIT)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    game = mnk.Game(*args.board, time_limit=args.time_limit,
+                    processes=args.processes)
+    classic = tuple(args.board) == (3, 3, 3)
+
+    print(f"{'engine':<8} {'games':<10} {'won':>5} {'drawn':>6} "
+          f"{'lost':>5} {'moves/s':>9} {'nodes/move':>11} "
+          f"{'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9}")
+    failures = 0
+    for name in args.engines:
+        if name in ("table", "search", "cold") and not classic:
+            print(f"{name:<8} skipped: only plays 3x3 Tic Tac Toe")
+            continue
+        if name == "table" and not ttt.load_solutions():
+            print(f"{name:<8} skipped: run python tictactoe.py to build "
+                  f"{ttt.SOLUTIONS}")
+            continue
+        engine, close = make_engine(name, game, args)
+        rng = random.Random(args.seed)
+        try:
+            for opponent in ("self", "random"):
+                games = (1 if opponent == "self" and name != "mcts"
+                         else args.games)
+                results, timings = play_games(game, engine, opponent, games,
+                                              rng)
+                won, drawn, lost = results
+                if name in PERFECT and classic and (
+                    lost or opponent == "self" and won
+                ):
+                    failures += 1
+                report(name, f"vs {opponent}", results, timings)
+        finally:
+            close()
+
+    game.close()
+    if failures:
+        sys.exit(f"{failures} match(es) lost by an engine that plays "
+                 "perfectly")
+
+
+def make_engine(name, game, args):
+    """
+    Returns a function that takes a board and returns a tuple of the
+    engine's move and the number of positions (or, for MCTS, playouts) it
+    examined, and a function that shuts down any workers the engine
+    started.
+    """
+    close = game.close
+    if name == "table":
+        def engine(board):
+            action, _ = ttt.solution(board)
+            return action, 1
+    elif name == "search":
+        def engine(board):
+            action, _, nodes = ttt.search(board)
+            return action, nodes
+    elif name == "cold":
+        def engine(board):
+            ttt.table.clear()
+            action, _, nodes = ttt.search(board)
+            return action, nodes
+    elif name == "mnk":
+        def engine(board):
+            action, _, nodes, _ = game.search(board)
+            return action, nodes
+    else:
+        player = mcts.MCTS(game, playouts=args.playouts, time_limit=None,
+                           processes=args.processes, seed=args.seed)
+        close = player.close
+
+        def engine(board):
+            action, _, playouts = player.search(board)
+            return action, playouts
+    return engine, close
+
+
+def play_games(game, engine, opponent, games, rng):
+    """
+    Plays `games` games of the engine against itself (`opponent` "self")
+    or against random moves ("random"), the engine taking X and O in turn.
+    Returns the engine's (won, drawn, lost) counts, counting X's results
+    in self-play, and a list of (seconds, nodes) for every engine move.
+    """
+    results = [0, 0, 0]
+    timings = []
+    for number in range(games):
+        side = ttt.X if number % 2 == 0 else ttt.O
+        board = game.initial_state()
+        while not game.terminal(board):
+            if opponent == "random" and game.player(board) != side:
+                action = rng.choice(sorted(game.actions(board)))
+            else:
+                start = time.perf_counter()
+                action, nodes = engine(board)
+                timings.append((time.perf_counter() - start, nodes))
+            board = game.result(board, action)
+        winner = game.winner(board)
+        if opponent == "self":
+            side = ttt.X
+        if winner is None:
+            results[1] += 1
+        elif winner == side:
+            results[0] += 1
+        else:
+            results[2] += 1
+    return results, timings
+
+
+def report(name, games, results, timings):
+    """
+    Prints a row of results and move statistics for one engine.
+    """
+    seconds = sorted(t for t, _ in timings)
+    total = sum(seconds)
+    nodes = sum(n for _, n in timings)
+    moves = len(timings)
+    won, drawn, lost = results
+    print(f"{name:<8} {games:<10} {won:>5} {drawn:>6} {lost:>5} "
+          f"{moves / total if total else 0:>9.0f} {nodes / moves:>11.1f} "
+          + " ".join(f"{1000 * percentile(seconds, p):>9.3f}"
+                     for p in (50, 90, 99, 100)))
+
+
+def percentile(values, p):
+    """
+    Returns the nearest-rank p-th percentile of a sorted list of values.
+    """
+    rank = max(1, -(-p * len(values) // 100))
+    return values[rank - 1]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Tic Tac Toe move service: reads boards as JSON lines on stdin and writes
+the optimal move for each as JSON lines on stdout
+"""
+
+import argparse
+import json
+import multiprocessing
+import queue
+import sys
+import threading
+
+import tictactoe as ttt
+
+# Most requests answered together
+BATCH = 1024
+
+
+def main():
+
+    # Check for proper usage
+    parser = argparse.ArgumentParser(
+        usage="python serve.py [--processes N] [--batch N]"
+    )
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=BATCH)
+    args = parser.parse_args()
+
+    # Start workers before the reader thread, which they must not inherit
+    pool = None
+    if args.processes > 1:
+        pool = multiprocessing.Pool(args.processes)
+
+    # Read lines on another thread, so that whatever has arrived is
+    # answered as one batch while more lines are still coming
+    lines = queue.Queue()
+    threading.Thread(
+        target=read_lines, args=(sys.stdin, lines), daemon=True
+    ).start()
+
+    answers = dict()
+    finished = False
+    while not finished:
+        batch = []
+        line = lines.get()
+        while line is not None:
+            batch.append(line)
+            if len(batch) >= args.batch:
+                break
+            try:
+                line = lines.get_nowait()
+            except queue.Empty:
+                break
+        else:
+            finished = True
+        for reply in serve(batch, answers, pool):
+            print(json.dumps(reply))
+        sys.stdout.flush()
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+
+def read_lines(file, lines):
+    """
+    Puts every non-blank line of a file on the `lines` queue, then None.
+    """
+    for line in file:
+        if line.strip():
+            lines.put(line)
+    lines.put(None)
+
+
+def serve(batch, answers, pool=None):
+    """
+    Returns a reply for each request line in a batch, in order.
+
+    A request is a board as a JSON list of 3 rows of "X", "O" or null,
+    or an object {"id": ..., "board": ...}. A reply is an object with
+    the request's id (if any), the optimal "move" as [i, j] (null once
+    the game is over) and its minimax "value", or with an "error".
+    """
+    replies = []
+    positions = []
+    for line in batch:
+        reply = dict()
+        try:
+            request = json.loads(line)
+            if isinstance(request, dict):
+                if "id" in request:
+                    reply["id"] = request["id"]
+                request = request.get("board")
+            positions.append(position(request))
+        except ValueError as e:
+            reply["error"] = str(e)
+            positions.append(None)
+        replies.append(reply)
+
+    valid = [p for p in positions if p is not None]
+    results = iter(best_moves(valid, answers, pool))
+    for reply, p in zip(replies, positions):
+        if p is not None:
+            action, value = next(results)
+            reply["move"] = None if action is None else list(action)
+            reply["value"] = value
+    return replies
+
+
+def position(board):
+    """
+    Returns the bitboard (x, o) of a board given as a list of lists.
+    Raises ValueError if it is not a board that can arise in a game.
+    """
+    if (not isinstance(board, list) or len(board) != 3 or
+            any(not isinstance(row, list) or len(row) != 3
+                for row in board)):
+        raise ValueError("a board must be a list of 3 lists of 3 cells")
+    if any(cell not in (ttt.X, ttt.O, ttt.EMPTY)
+           for row in board for cell in row):
+        raise ValueError("cells must be \"X\", \"O\" or null")
+    x, o = ttt.encode(board)
+    moved = ttt.COUNT[x] - ttt.COUNT[o]
+    if moved not in (0, 1):
+        raise ValueError("X moves first and players alternate")
+    if ttt.WINS[x] and ttt.WINS[o]:
+        raise ValueError("the game ends when one player has a line")
+    if ttt.WINS[x] and moved != 1 or ttt.WINS[o] and moved != 0:
+        raise ValueError("the game ends on the winning move")
+    return x, o
+
+
+def best_moves(positions, answers=None, pool=None):
+    """
+    Returns (optimal action, minimax value) for each bitboard in
+    `positions`.
+
+    Boards that are rotations or reflections of each other are solved
+    once, as their canonical board, and the move is mapped back through
+    each board's symmetry. Canonical boards are answered from `answers`,
+    a dictionary kept between calls, then from the precomputed solutions
+    table, and otherwise by searching them, across `pool` if one is
+    given.
+    """
+    if answers is None:
+        answers = dict()
+    keys = [ttt.canonical(x, o) for x, o in positions]
+
+    unsolved = []
+    for key, _ in keys:
+        if key in answers:
+            continue
+        x, o = key >> 9, key & ttt.FULL
+        solved = ttt.solution(ttt.decode(x, o))
+        if solved is None:
+            answers[key] = None
+            unsolved.append(key)
+        else:
+            answers[key] = cell_value(*solved)
+    if unsolved:
+        boards = [(key >> 9, key & ttt.FULL) for key in unsolved]
+        solved = pool.map(solve, boards) if pool else map(solve, boards)
+        for key, answer in zip(unsolved, solved):
+            answers[key] = answer
+
+    results = []
+    for key, symmetry in keys:
+        cell, value = answers[key]
+        if cell is None:
+            results.append((None, value))
+        else:
+            results.append((divmod(ttt.INVERSES[symmetry][cell], 3), value))
+    return results
+
+
+def solve(board):
+    """
+    Returns (best cell, minimax value) of a bitboard by searching it.
+    """
+    action, value, _ = ttt.search(ttt.decode(*board))
+    return cell_value(action, value)
+
+
+def cell_value(action, value):
+    """
+    Returns an (action, value) pair with the action as a cell index.
+    """
+    return (None if action is None else 3 * action[0] + action[1]), value
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,102 @@
 Tic Tac Toe Player
 """
 
-import math
+import mmap
+import os
+from collections import OrderedDict
 from sys import _xoptions
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Most positions the transposition table keeps before evicting the least
+# recently used one
+TABLE_SIZE = 100000
+
+# Positions are bitboards: a pair of 9-bit masks (x, o) with bit 3 * i + j
+# set when X or O has played in cell (i, j)
+FULL = (1 << 9) - 1
+
+LINES = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# WINS[mask] is True if the cells in mask complete a line
+WINS = [any(mask & line == line for line in LINES) for mask in range(1 << 9)]
+
+# COUNT[mask] is the number of cells in mask
+COUNT = [bin(mask).count("1") for mask in range(1 << 9)]
+
+# TERNARY[mask] is the sum of 3 ** k over the cells k in mask, so that
+# TERNARY[x] + 2 * TERNARY[o] is the base-3 encoding of bitboard (x, o)
+TERNARY = [
+    sum(3 ** k for k in range(9) if mask >> k & 1) for mask in range(1 << 9)
+]
+
+# File of perfect play written by `solve_all`: one byte per base-3 board
+# encoding, holding (value + 1) << 4 | best cell, or UNSOLVED for boards
+# that cannot be reached in a game
+SOLUTIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "tictactoe.bin")
+UNSOLVED = 0xFF
+NO_MOVE = 9
+
+
+def symmetries():
+    """
+    Returns the 8 rotations and reflections of the board, each as a list
+    mapping every cell index 3 * i + j to the index of the cell it becomes.
+    """
+    rotate = [3 * j + (2 - i) for i in range(3) for j in range(3)]
+    reflect = [3 * i + (2 - j) for i in range(3) for j in range(3)]
+    result = []
+    transform = list(range(9))
+    for _ in range(4):
+        result.append(transform)
+        result.append([reflect[k] for k in transform])
+        transform = [rotate[k] for k in transform]
+    return result
+
+
+def transform_table(symmetry):
+    """
+    Returns a list mapping every 9-bit mask to its image under symmetry.
+    """
+    table = [0] * (1 << 9)
+    for mask in range(1 << 9):
+        for k in range(9):
+            if mask >> k & 1:
+                table[mask] |= 1 << symmetry[k]
+    return table
+
+
+SYMMETRIES = symmetries()
+TRANSFORMS = [transform_table(symmetry) for symmetry in SYMMETRIES]
+
+# INVERSES[s][k] is the cell that symmetry s moves to cell k
+INVERSES = [
+    [symmetry.index(k) for k in range(9)] for symmetry in SYMMETRIES
+]
+
+# Cells in the order moves are searched: centre, corners, then edges
+ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# Kinds of value a search can prove: the exact value, or a lower or upper
+# bound on it when the search was cut off
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Results of positions already searched, keyed by `canonical(x, o)`, as
+# tuples (value, kind of value, best cell in the canonical orientation)
+table = OrderedDict()
+
+# Memory map of the SOLUTIONS file, once it has been looked for
+solutions = None
+
 
 def initial_state():
     """
@@ -23,15 +112,7 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    xCounter = 0
-    oCounter = 0
-    for i in range(3):
-        for j in range(3):
-            if(board[i][j] == X):
-                xCounter+=1
-            elif(board[i][j] == O):
-                oCounter += 1
-    return X if xCounter == oCounter else O
+    return X if to_move(*encode(board)) else O
     raise NotImplementedError
 
 
@@ -39,12 +120,7 @@ def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    result = set()
-    for i in range(3):
-        for j in range(3):
-            if(board[i][j] == EMPTY):
-                result.add((i,j))
-    return result
+    return {divmod(k, 3) for k in moves(*encode(board))}
 
     raise NotImplementedError
 
@@ -53,22 +129,17 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    newBoard = initial_state()
-    
-    for i in range(3):
-        for j in range(3):
-            newBoard[i][j] = board[i][j]
-    if(terminal(board)):
-        return newBoard
-    if(action != None):
-        if(action[0]>2 or action[0] < 0):
-            raise ValueError
-        if(action[1]>2 or action[1] < 0):
-            raise ValueError
-    else:
-        return newBoard
-    newBoard[action[0]][action[1]] = player(board)
-    return newBoard
+    x, o = encode(board)
+    if(bit_terminal(x, o) or action == None):
+        return decode(x, o)
+    if(action[0]>2 or action[0] < 0):
+        raise ValueError
+    if(action[1]>2 or action[1] < 0):
+        raise ValueError
+    bit = 1 << (3 * action[0] + action[1])
+    if((x | o) & bit):
+        raise ValueError
+    return decode(*play(x, o, bit))
     raise NotImplementedError
 
 
@@ -76,20 +147,11 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    for i in range(3):
-        if(board[i][0] != EMPTY):
-            if(board[i][0] == board[i][1] and board[i][1] == board[i][2]):
-                return board[i][0]
-    for i in range (3):
-        if(board[0][i] != EMPTY):
-            if(board[0][i] == board[1][i] and board[1][i] == board[2][i]):
-                return board[0][i]
-    if(board[0][0] != EMPTY):
-        if(board[0][0] == board[1][1] and board[1][1] == board[2][2]):
-            return board[0][0]
-    if(board[2][0] != EMPTY):
-        if(board[2][0] == board[1][1] and board[1][1] == board[0][2]):
-            return board[2][0]
+    x, o = encode(board)
+    if(WINS[x]):
+        return X
+    if(WINS[o]):
+        return O
     return None
     raise NotImplementedError
 
@@ -98,7 +160,7 @@ def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    return ((len(actions(board)) == 0) or (winner(board) != None))
+    return bit_terminal(*encode(board))
     raise NotImplementedError
 
 
@@ -106,67 +168,249 @@ def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    theWinner = winner(board)
-    if(theWinner == X):
-        return 1
-    elif(theWinner == O):
-        return -1
-    return 0
+    return bit_utility(*encode(board))
     raise NotImplementedError
 
 
+def encode(board):
+    """
+    Returns the bitboard (x, o) of a list-of-lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if(board[i][j] == X):
+                x |= 1 << (3 * i + j)
+            elif(board[i][j] == O):
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def decode(x, o):
+    """
+    Returns the list-of-lists board of a bitboard (x, o).
+    """
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1
+             else EMPTY for j in range(3)] for i in range(3)]
+
+
+def to_move(x, o):
+    """
+    Returns True if X has the next turn on bitboard (x, o), False if O does.
+    """
+    return COUNT[x] == COUNT[o]
+
+
+def moves(x, o):
+    """
+    Returns the list of empty cell indices on bitboard (x, o), in order.
+    """
+    empty = FULL & ~(x | o)
+    return [k for k in range(9) if empty >> k & 1]
+
+
+def play(x, o, bit):
+    """
+    Returns the bitboard after the player to move takes the cell `bit`.
+    """
+    return (x | bit, o) if to_move(x, o) else (x, o | bit)
+
+
+def bit_terminal(x, o):
+    """
+    Returns True if the game on bitboard (x, o) is over.
+    """
+    return WINS[x] or WINS[o] or (x | o) == FULL
+
+
+def bit_utility(x, o):
+    """
+    Returns 1 if X has won on bitboard (x, o), -1 if O has won, 0 otherwise.
+    """
+    return 1 if WINS[x] else -1 if WINS[o] else 0
+
+
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    #Copying
-    newBoard = initial_state()
-    for i in range(3):
-        for j in  range(3):
-            newBoard[i][j] = board[i][j]
-    newState = State(newBoard,None,None) #Convert to State
-    stack = []
-    stack.append(newState)
-    while(stack): #dfs
-        curr = stack[-1] #curr is e.o.s
-        #curr is due to be scored if curr is terminal or all children of curr have been scored
-        if(curr.terminal or curr.unprocessedAction == len(curr.actions)): #Scoring
-            #Not terminal but due to be scored
-            if(not curr.terminal): 
-                #Ternary operator for scoring
-                curr.score = max(curr.actionScores) if player(curr.board) == X else min(curr.actionScores)
-                #Finding the action that gave the score 
-                index = curr.actionScores.index(curr.score)
-                curr.scoreProvider = curr.actions[index]
-            #To avoid querying attributes of NoneType (also if curr.parent == None, curr is newState) 
-            if(curr.parent != None): 
-                index = curr.parent.unprocessedAction-1
-                curr.parent.actionScores[index] = curr.score
-                #If child has extreme score in alignment with parent player's objective, 
-                #Then no need to check other children to score parent
-                if(curr.score == 1 and curr.parent.player == X):  
-                    curr.parent.unprocessedAction = len(curr.parent.actions)
-                elif(curr.score == -1 and curr.parent.player == O):
-                    curr.parent.unprocessedAction = len(curr.parent.actions)
-            stack.remove(curr)
-        #Add new State to stack
-        else: 
-            initAction = curr.actions[curr.unprocessedAction]
-            stack.append(State(result(curr.board,initAction),initAction,curr))
-            curr.unprocessedAction = curr.unprocessedAction + 1
-    return newState.scoreProvider
+    solved = solution(board)
+    if solved is not None:
+        return solved[0]
+    action, _, _ = search(board)
+    return action
     raise NotImplementedError
 
-class State():
-    def __init__(self,board,initAction,parent):
-        self.board = board
-        self.terminal = terminal(board)
-        self.player = player(board)
-        self.actions = list(actions(board))
-        self.actionScores = [0]*len(self.actions) #corresponds index-wise to actions
-        self.unprocessedAction = 0 #index for actionScores 
-        self.initAction = initAction #action from parent that got to this node
-        self.parent = parent #parent node of type State 
-        self.score = None if not self.terminal else utility(board)
-        self.scoreProvider = None
-        
\ No newline at end of file
+
+def search(board):
+    """
+    Searches the board with alpha-beta pruning. Returns a tuple of the
+    optimal action (None if the game is over), its minimax value and the
+    number of positions visited.
+    """
+    nodes = 0
+
+    def alphabeta(x, o, alpha, beta):
+        """
+        Returns (value, best cell) of bitboard (x, o). The value is exact
+        if it lies strictly between alpha and beta; otherwise it is only an
+        upper bound (if at most alpha) or a lower bound (if at least beta).
+        """
+        nonlocal nodes
+        nodes += 1
+        if WINS[x]:
+            return 1, None
+        if WINS[o]:
+            return -1, None
+        if (x | o) == FULL:
+            return 0, None
+
+        # A stored result can settle the position or narrow the window, and
+        # its best move is searched first
+        key, symmetry = canonical(x, o)
+        first = None
+        entry = lookup(key)
+        if entry is not None:
+            value, kind, best = entry
+            best = INVERSES[symmetry][best]
+            if (kind == EXACT or (kind == LOWER and value >= beta) or
+                    (kind == UPPER and value <= alpha)):
+                return value, best
+            if kind == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            first = best
+
+        occupied = x | o
+        cells = [first] if first is not None else []
+        cells += [k for k in ORDER if not occupied >> k & 1 and k != first]
+
+        maximizing = to_move(x, o)
+        low, high = alpha, beta
+        value = -2 if maximizing else 2
+        best = None
+        for k in cells:
+            if maximizing:
+                score, _ = alphabeta(x | 1 << k, o, alpha, beta)
+                if score > value:
+                    value, best = score, k
+                    alpha = max(alpha, value)
+            else:
+                score, _ = alphabeta(x, o | 1 << k, alpha, beta)
+                if score < value:
+                    value, best = score, k
+                    beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        kind = UPPER if value <= low else LOWER if value >= high else EXACT
+        store(key, (value, kind, SYMMETRIES[symmetry][best]))
+        return value, best
+
+    value, best = alphabeta(*encode(board), -1, 1)
+    action = None if best is None else divmod(best, 3)
+    return action, value, nodes
+
+
+def canonical(x, o):
+    """
+    Returns a key that is the same for bitboard (x, o) and all of its
+    rotations and reflections, the smallest of the 8 transformed positions,
+    along with the index of the symmetry that gives it.
+    """
+    return min((t[x] << 9 | t[o], s) for s, t in enumerate(TRANSFORMS))
+
+
+def lookup(key):
+    """
+    Returns the stored search result for a canonical key, or None if the
+    position has not been searched.
+    """
+    entry = table.get(key)
+    if entry is not None:
+        table.move_to_end(key)
+    return entry
+
+
+def store(key, entry):
+    """
+    Records the search result for a canonical key in the transposition
+    table, evicting the least recently used position if the table is full.
+    """
+    table[key] = entry
+    table.move_to_end(key)
+    if len(table) > TABLE_SIZE:
+        table.popitem(last=False)
+
+
+def solution(board):
+    """
+    Returns (optimal action, minimax value) for the board from the
+    precomputed SOLUTIONS file, or None if there is no file or the board
+    is not in it.
+    """
+    global solutions
+    if solutions is None:
+        solutions = load_solutions()
+    if not solutions:
+        return None
+    x, o = encode(board)
+    entry = solutions[TERNARY[x] + 2 * TERNARY[o]]
+    if entry == UNSOLVED:
+        return None
+    cell = entry & 0xF
+    return (None if cell == NO_MOVE else divmod(cell, 3)), (entry >> 4) - 1
+
+
+def load_solutions(filename=SOLUTIONS):
+    """
+    Returns a read-only memory map of a solutions file, shared between every
+    process that maps it, or False if it is missing or the wrong size.
+    """
+    try:
+        with open(filename, "rb") as f:
+            solved = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return False
+    if len(solved) != 3 ** 9:
+        solved.close()
+        return False
+    return solved
+
+
+def solve_all(filename=SOLUTIONS):
+    """
+    Solves every position reachable from the initial state and writes the
+    best move and value of each to a solutions file.
+    Returns the number of positions solved.
+    """
+    solved = bytearray([UNSOLVED]) * 3 ** 9
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        index = TERNARY[x] + 2 * TERNARY[o]
+        if solved[index] != UNSOLVED:
+            continue
+        action, value, _ = search(decode(x, o))
+        cell = NO_MOVE if action is None else 3 * action[0] + action[1]
+        solved[index] = (value + 1) << 4 | cell
+        if not bit_terminal(x, o):
+            for k in moves(x, o):
+                stack.append(play(x, o, 1 << k))
+
+    # Replace the file in one step so that readers never see half of it
+    temporary = filename + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(solved)
+    os.replace(temporary, filename)
+    return len(solved) - solved.count(UNSOLVED)
+
+
+def main():
+    count = solve_all()
+    print(f"Solved {count} positions into {SOLUTIONS}")
+
+
+if __name__ == "__main__":
+    main()